@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - Search and design-system performance on shipped and scaled data
+Usage: python benchmark.py [--scales 1,10,100] [--output run.json]
+       python benchmark.py --compare baseline.json [--threshold 0.10]
+       python benchmark.py --startup [--budget-ratio 4.0] [--runs 7] [--query "glassmorphism"]
+
+Suite (per data scale):
+  fit          CSV parse + tokenize + BM25 fit per CSV, and warm artifact load time
+  latency      Per-query latency p50/p95/p99 with the result cache disabled
+  batch        search_batch() throughput in queries per second
+  memory       Peak traced memory while building and querying every index
+  design       End-to-end DesignSystemGenerator.generate() time
+
+Scales above 1 run on synthetic copies of data/ where every CSV row is
+repeated N times (each copy tagged with a distinct token) in a temp dir.
+Results are JSON; --compare exits with status 1 when any metric is worse
+than the baseline by more than --threshold (relative).
+
+Startup:
+  Each run is a fresh `python -X importtime search.py "<query>"` process,
+  interleaved with a bare `python -X importtime -c pass`. Bytecode goes to a
+  private cache (PYTHONPYCACHEPREFIX) warmed by one untimed run, so the
+  numbers reflect a normal installed setup rather than first-run compiles.
+  The budget is the ratio of the two median wall times, so it holds on fast
+  and slow machines alike. A plain search must also not import any of
+  STARTUP_DEFERRED_MODULES, which only the paths needing them load. Runs
+  on a temporary copy of scripts/ and data/, so the real .index is left
+  alone; exits with status 1 when over budget.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+# search.py wall time over a bare interpreter's: measured 3.4-3.8 here, the
+# same as the tree before indexing and profiling were added (3.4-3.7)
+STARTUP_BUDGET_RATIO = 4.0
+# Loaded lazily by the profiling, concurrency, persistence and design-system paths
+STARTUP_DEFERRED_MODULES = ("threading", "contextvars", "contextlib", "concurrent.futures", "csv", "json",
+                            "hashlib", "tempfile", "socket", "sqlite3", "mmap", "numpy", "design_system")
+REGRESSION_THRESHOLD = 0.10
+
+QUERIES = [
+    "glassmorphism dark", "saas dashboard", "fintech crypto", "beauty spa wellness service",
+    "animation accessibility", "elegant luxury serif", "real-time dashboard", "hero social-proof",
+    "layout responsive form", "minimal clean portfolio", "bar chart trend", "color palette healthcare",
+    "memo rerender", "aria focus outline", "icons navigation", "ecommerce conversion pricing",
+    "mobile touch targets", "dark mode contrast", "ai chatbot interface", "glasmorphsm"
+]
+DESIGN_QUERIES = ["SaaS dashboard", "beauty spa wellness", "fintech crypto", "e-commerce luxury", "gaming"]
+
+
+# ============ STARTUP ============
+def _parse_importtime(stderr):
+    """Top-level modules and their cumulative import time (us) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented; only top-level ones add up to the total
+        if not name[1:].startswith(" "):
+            modules[name.strip()] = modules.get(name.strip(), 0) + int(cumulative)
+    return modules
+
+
+def _run(args, env, cwd=SCRIPTS_DIR):
+    start = time.perf_counter()
+    proc = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True)
+    return (time.perf_counter() - start) * 1000, proc
+
+
+def _median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def _imported_modules(stderr):
+    """Every module (nested ones included) named in -X importtime output"""
+    return {line.split("|", 2)[2].strip() for line in stderr.splitlines()
+            if line.startswith("import time:") and line.count("|") >= 2 and line.split("|")[1].strip().isdigit()}
+
+
+def measure_startup(query="glassmorphism", runs=7):
+    """
+    Cold-start cost of a plain domain search.
+
+    Returns wall time of search.py and of a bare interpreter, their ratio,
+    the import time of every module search.py pulls in beyond interpreter
+    startup, and which STARTUP_DEFERRED_MODULES it imported anyway.
+    """
+    import shutil
+    with tempfile.TemporaryDirectory() as workdir:
+        # A private copy, so the untimed first run builds its index there
+        scripts = Path(workdir) / "scripts"
+        shutil.copytree(SCRIPTS_DIR, scripts, ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copytree(SCRIPTS_DIR.parent / "data", Path(workdir) / "data")
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=str(Path(workdir) / "pycache"))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        search_cmd = [sys.executable, "-X", "importtime", "search.py", query]
+        baseline_cmd = [sys.executable, "-X", "importtime", "-c", "pass"]
+
+        _run(search_cmd, env, scripts)  # build the index and warm the bytecode cache
+        wall, baseline_wall, import_totals, modules, deferred = [], [], [], {}, set()
+        for _ in range(runs):
+            elapsed, proc = _run(search_cmd, env, scripts)
+            if proc.returncode != 0:
+                raise RuntimeError(proc.stderr.strip() or f"search.py exited with {proc.returncode}")
+            base_elapsed, base_proc = _run(baseline_cmd, env, scripts)
+
+            # Whatever the bare interpreter also imports is not search.py's cost
+            own = _parse_importtime(proc.stderr)
+            for name in _parse_importtime(base_proc.stderr):
+                own.pop(name, None)
+            wall.append(elapsed)
+            baseline_wall.append(base_elapsed)
+            import_totals.append(sum(own.values()) / 1000)
+            for name, us in own.items():
+                modules.setdefault(name, []).append(us / 1000)
+            deferred |= (_imported_modules(proc.stderr) - _imported_modules(base_proc.stderr)) & set(STARTUP_DEFERRED_MODULES)
+
+    return {
+        "query": query,
+        "runs": runs,
+        "wall_ms": round(_median(wall), 2),
+        "interpreter_ms": round(_median(baseline_wall), 2),
+        "ratio": round(_median(wall) / _median(baseline_wall), 2),
+        "import_ms": round(_median(import_totals), 2),
+        "modules_ms": {name: round(_median(times), 2) for name, times in
+                       sorted(modules.items(), key=lambda x: -_median(x[1]))},
+        "deferred_imported": sorted(deferred)
+    }
+
+
+# ============ SYNTHETIC DATA ============
+def make_scaled_data(src, dst, factor):
+    """Copy every CSV under src to dst with each row repeated factor times"""
+    import csv
+    import shutil
+    from core import DOMAIN_KEYWORDS_FILE
+    for source in Path(src).rglob("*.csv"):
+        target = Path(dst) / source.relative_to(src)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Routing config, not searchable data
+        if source.relative_to(src) == Path(DOMAIN_KEYWORDS_FILE):
+            shutil.copyfile(source, target)
+            continue
+        with open(source, 'r', encoding='utf-8', newline='') as f_in, \
+                open(target, 'w', encoding='utf-8', newline='') as f_out:
+            reader = csv.reader(f_in)
+            writer = csv.writer(f_out)
+            writer.writerow(next(reader))
+            rows = list(reader)
+            for copy in range(factor):
+                for row in rows:
+                    # Tag copies so the vocabulary grows like real data would
+                    writer.writerow([f"{row[0]} variant{copy}"] + row[1:] if copy and row else row)
+
+
+def _use_data_dir(data_dir, index_dir):
+    """Point core (and design_system) at another data/index directory and drop warm state"""
+    import core
+    import design_system
+    core.DATA_DIR = Path(data_dir)
+    core.INDEX_DIR = Path(index_dir)
+    design_system.DATA_DIR = core.DATA_DIR
+    core._LOADED_INDEXES.clear()
+    core._GLOBAL_INDEXES.clear()
+    core.RESULT_CACHE.clear()
+
+
+def _targets():
+    """(name, filepath, search_cols, output_cols, search_weights) for every domain and stack"""
+    import core
+    targets = []
+    for domain, config in core.CSV_CONFIG.items():
+        targets.append((domain, core.DATA_DIR / config["file"], config["search_cols"],
+                        config["output_cols"], config.get("search_weights", {})))
+    for stack, config in core.STACK_CONFIG.items():
+        config = core.stack_config(stack)
+        targets.append((core.stack_tag(stack), core.DATA_DIR / config["file"], config["search_cols"],
+                        config["output_cols"], config["search_weights"]))
+    return [target for target in targets if target[1].exists()]
+
+
+# ============ MEASUREMENTS ============
+def _percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def bench_fit():
+    """Cold build (parse + tokenize + fit) and warm artifact load per CSV, in ms"""
+    import core
+    fit, load, rows = {}, {}, 0
+    for name, filepath, search_cols, output_cols, weights in _targets():
+        raw = filepath.read_bytes()
+        start = time.perf_counter()
+        built = core._build_index(raw, search_cols, output_cols, weights)
+        fit[name] = round((time.perf_counter() - start) * 1000, 3)
+        rows += built["bm25"]["N"]
+
+        core._load_index(filepath, search_cols, output_cols, weights)  # write the artifact
+        start = time.perf_counter()
+        core._load_index(filepath, search_cols, output_cols, weights)
+        load[name] = round((time.perf_counter() - start) * 1000, 3)
+    return {"rows": rows, "fit_ms": fit, "fit_total_ms": round(sum(fit.values()), 3),
+            "load_ms": load, "load_total_ms": round(sum(load.values()), 3)}
+
+
+def bench_latency(rounds=3):
+    """Per-query latency over every domain with warm indexes and no result cache"""
+    import core
+    cache_size = core.RESULT_CACHE.maxsize
+    core.RESULT_CACHE.maxsize = 0
+    try:
+        core.preload_indexes()
+        latencies = []
+        for _ in range(rounds):
+            for domain in core.CSV_CONFIG:
+                for query in QUERIES:
+                    start = time.perf_counter()
+                    core.search(query, domain)
+                    latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        core.RESULT_CACHE.maxsize = cache_size
+        core.RESULT_CACHE.clear()
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p95_ms": round(_percentile(latencies, 95), 4),
+        "p99_ms": round(_percentile(latencies, 99), 4)
+    }
+
+
+def bench_batch(repeat=50):
+    """search_batch() throughput across all domains, result cache disabled"""
+    import core
+    cache_size = core.RESULT_CACHE.maxsize
+    core.RESULT_CACHE.maxsize = 0
+    try:
+        core.preload_indexes()
+        queries = [f"{query} {i}" for i in range(repeat) for query in QUERIES]
+        start = time.perf_counter()
+        for domain in core.CSV_CONFIG:
+            core.search_batch(queries, domain)
+        elapsed = time.perf_counter() - start
+    finally:
+        core.RESULT_CACHE.maxsize = cache_size
+        core.RESULT_CACHE.clear()
+    total = len(queries) * len(core.CSV_CONFIG)
+    return {"queries": total, "vectorized": core.vector_backend_available(),
+            "throughput_qps": round(total / elapsed, 1)}
+
+
+def bench_memory():
+    """Peak traced memory (MB) building every index from CSV and answering queries"""
+    import core
+    import tracemalloc
+    core._LOADED_INDEXES.clear()
+    core._GLOBAL_INDEXES.clear()
+    tracemalloc.start()
+    try:
+        for name, filepath, search_cols, output_cols, weights in _targets():
+            built = core._build_index(filepath.read_bytes(), search_cols, output_cols, weights)
+            del built
+        build_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        for query in QUERIES:
+            core.search_domains(query, {domain: core.MAX_RESULTS for domain in core.CSV_CONFIG})
+        resident, query_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        core.RESULT_CACHE.clear()
+    return {"build_peak_mb": round(build_peak / 2 ** 20, 3), "query_peak_mb": round(query_peak / 2 ** 20, 3),
+            "resident_mb": round(resident / 2 ** 20, 3)}
+
+
+def bench_design_system():
+    """End-to-end generate() time per query with warm indexes, plus mean time per phase (ms)"""
+    import core
+    from design_system import DesignSystemGenerator
+    core.preload_indexes()
+    timings, phases = {}, {}
+    for query in DESIGN_QUERIES:
+        core.RESULT_CACHE.clear()
+        generator = DesignSystemGenerator()
+        start = time.perf_counter()
+        generator.generate(query)
+        timings[query] = round((time.perf_counter() - start) * 1000, 3)
+        for phase, ms in generator.timings.items():
+            phases[phase] = phases.get(phase, 0.0) + ms / len(DESIGN_QUERIES)
+    core.RESULT_CACHE.clear()
+    return {"generate_ms": timings, "generate_mean_ms": round(sum(timings.values()) / len(timings), 3),
+            "phases_ms": {phase: round(ms, 3) for phase, ms in phases.items()}}
+
+
+def run_suite(scales=(1, 10, 100)):
+    """Run every measurement at every data scale; returns a JSON-ready dict"""
+    import platform
+    import core
+    shipped, shipped_index = core.DATA_DIR, core.INDEX_DIR
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in scales:
+            data_dir = shipped if factor == 1 else Path(tmp) / f"data-{factor}x"
+            if factor != 1:
+                make_scaled_data(shipped, data_dir, factor)
+            _use_data_dir(data_dir, Path(tmp) / f"index-{factor}x")
+            results[f"{factor}x"] = {
+                "fit": bench_fit(),
+                "latency": bench_latency(),
+                "batch": bench_batch(),
+                "memory": bench_memory(),
+                "design": bench_design_system()
+            }
+    _use_data_dir(shipped, shipped_index)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scales": list(scales)
+        },
+        "results": results
+    }
+
+
+# ============ REGRESSION CHECK ============
+def _flatten(tree, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1} for numeric leaves"""
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Metrics worse than baseline by more than threshold (relative).
+
+    Throughput (_qps) is higher-is-better; times and memory are lower-is-better.
+    Only aggregates (scale.section.metric) are checked: per-CSV and per-query
+    breakdowns are too small to be stable, and counts (rows, queries) are ignored.
+    """
+    now, before = _flatten(current["results"]), _flatten(baseline["results"])
+    regressions = []
+    for path, old in before.items():
+        new = now.get(path)
+        name = path.rsplit(".", 1)[-1]
+        if new is None or path.count(".") != 2 or name in ("rows", "queries") or old <= 0:
+            continue
+        change = (old - new) / old if name.endswith("_qps") else (new - old) / old
+        if change > threshold:
+            regressions.append({"metric": path, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmark")
+    parser.add_argument("--scales", type=str, default="1,10,100", help="Data scale factors (default: 1,10,100; e.g. 1,10,100,1000)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", type=str, default=None, metavar="BASELINE", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help=f"Allowed relative regression (default: {REGRESSION_THRESHOLD})")
+    parser.add_argument("--startup", action="store_true", help="Measure search.py cold-start import time")
+    parser.add_argument("--budget-ratio", type=float, default=STARTUP_BUDGET_RATIO, help=f"Startup budget as search.py / bare interpreter wall time (default: {STARTUP_BUDGET_RATIO})")
+    parser.add_argument("--runs", type=int, default=7, help="Timed startup runs (default: 7)")
+    parser.add_argument("--query", type=str, default="glassmorphism", help="Query used for the startup run")
+
+    args = parser.parse_args()
+
+    if args.startup:
+        result = measure_startup(args.query, args.runs)
+        result["budget_ratio"] = args.budget_ratio
+        result["within_budget"] = result["ratio"] <= args.budget_ratio and not result["deferred_imported"]
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["within_budget"] else 1)
+
+    result = run_suite([int(factor) for factor in args.scales.split(",")])
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        result["regressions"] = compare(result, baseline, args.threshold)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if result.get("regressions"):
+        for regression in result["regressions"]:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"(+{regression['change']:.1%})", file=sys.stderr)
+        sys.exit(1)
@@ -4,71 +4,99 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import _thread
+import functools
+import os
 import re
+import sys
+import time
 from pathlib import Path
-from math import log
-from collections import defaultdict
+from math import frexp, log
+from collections import OrderedDict, defaultdict
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+INDEX_DIR = Path(__file__).parent.parent / ".index"
+INDEX_VERSION = 9
 MAX_RESULTS = 3
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_FILE = INDEX_DIR / "results.cache"
+
+# search_weights: optional BM25F weight per search column (default 1.0),
+# baked into the index so weighting costs nothing at query time
+# facet_cols: optional categorical output columns that search(where=...)
+# can filter on and search(facets=True) counts
 
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "search_weights": {"Style Category": 3.0, "Keywords": 2.0},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
         "file": "prompts.csv",
         "search_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords"],
+        "search_weights": {"Style Category": 3.0, "AI Prompt Keywords (Copy-Paste Ready)": 1.5},
         "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"]
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Keywords", "Notes"],
+        "search_weights": {"Product Type": 3.0, "Keywords": 2.0, "Notes": 0.5},
         "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"]
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
+        "search_weights": {"Data Type": 3.0, "Keywords": 2.0, "Best Chart Type": 2.0, "Accessibility Notes": 0.5},
         "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
+        "search_weights": {"Pattern Name": 3.0, "Keywords": 2.0},
         "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
+        "search_weights": {"Product Type": 3.0, "Keywords": 2.0, "Key Considerations": 0.5},
         "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "search_weights": {"Category": 2.0, "Issue": 3.0},
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "search_weights": {"Font Pairing Name": 2.0, "Category": 1.5, "Mood/Style Keywords": 2.0},
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
-        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
+        "search_weights": {"Category": 1.5, "Icon Name": 3.0, "Keywords": 2.0},
+        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"],
+        "facet_cols": ["Category", "Library", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "search_weights": {"Category": 2.0, "Issue": 3.0, "Keywords": 2.0},
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"]
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "search_weights": {"Category": 2.0, "Issue": 3.0, "Keywords": 2.0},
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"]
     }
 }
 
@@ -90,132 +118,1829 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
-    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
+    "search_weights": {"Category": 2.0, "Guideline": 3.0, "Do": 0.5, "Don't": 0.5},
+    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"],
+    "facet_cols": ["Category", "Severity"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+def stack_config(stack):
+    """CSV_CONFIG-style entry for a stack: its file plus the columns every stack shares"""
+    return {"file": STACK_CONFIG[stack]["file"], **_STACK_COLS}
+
+# Multi-stack search folds a merged hit into an earlier one when their
+# Guideline + Description token sets overlap at least this much (Jaccard)
+STACK_DEDUPE_SIMILARITY = 0.75
+
+# Keywords that route a query to a domain when no domain is given: one
+# "Domain, Keywords" row per domain (comma-separated keywords, matched as
+# substrings of the lowercased query; no quotes inside); earlier rows win
+# score ties. The compiled router is cached in INDEX_DIR.
+DOMAIN_KEYWORDS_FILE = "domain-keywords.csv"
+
+
+# Words of one or two characters are dropped as noise, except these
+SHORT_TOKENS = frozenset({"ui", "ux", "ai", "ar", "vr", "xr", "2d", "3d", "ml", "js", "ts", "os", "qr", "db", "tv", "pc", "hr"})
+
+# Query words missing from an index match vocabulary terms with at least
+# this character-trigram similarity (0 disables fuzzy matching)
+FUZZY_THRESHOLD = 0.5
+FUZZY_MIN_LENGTH = 4
+# Prefix matches ("neumorph" -> "neumorphism") need at least this many
+# characters on the shorter side; shorter words only match their plural
+# ("icon" <-> "icons"), not another word ("mode" -> "modern", "form" -> "for")
+FUZZY_PREFIX_MIN_LENGTH = 5
+
+ANALYZER_CONFIG = {
+    "min_length": 3,
+    "keep": SHORT_TOKENS,
+    "stem": False
+}
+
+# Incremental updates: edited CSVs are diffed against the stored index by row
+# fingerprint. Postings are renormalized (and tombstones dropped) once average
+# field lengths drift past RENORMALIZE_TOLERANCE or tombstones pass
+# TOMBSTONE_LIMIT of all slots; edits touching more than
+# INCREMENTAL_MAX_CHANGE of the rows rebuild from scratch.
+RENORMALIZE_TOLERANCE = 0.05
+TOMBSTONE_LIMIT = 0.25
+INCREMENTAL_MAX_CHANGE = 0.5
+
+# Hybrid retrieval (optional numpy): LSA document vectors, an IVF index for
+# collections of at least ANN_MIN_DOCS documents (smaller ones are scanned
+# exactly), and reciprocal-rank fusion of the top HYBRID_CANDIDATES of each
+DENSE_VERSION = 2
+LSA_DIMENSIONS = 64
+ANN_MIN_DOCS = 2048
+ANN_PROBES = 4
+HYBRID_CANDIDATES = 50
+RRF_K = 60
+
+
+# ============ TEXT ANALYSIS ============
+# Every ASCII character that is neither a word character nor whitespace
+_ASCII_PUNCT_TABLE = str.maketrans({ch: " " for ch in "!\"#$%&'()*+,-./:;<=>?@[\\]^`{|}~"})
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def _light_stem(word):
+    """S-stemmer: strip plural endings only (policies -> policy, cards -> card)"""
+    if len(word) <= 3 or word[-1] != "s":
+        return word
+    if word.endswith("ies") and not word.endswith(("eies", "aies")):
+        return word[:-3] + "y"
+    if word.endswith("es") and not word.endswith(("aes", "ees", "oes")):
+        return word[:-1]
+    if not word.endswith(("us", "ss")):
+        return word[:-1]
+    return word
+
+
+class Analyzer:
+    """
+    Turns text into index terms: lowercase, punctuation to spaces, split,
+    drop short words (except whitelisted ones), optionally stem.
+
+    Query analysis is memoized with an LRU cache; index-side analysis runs
+    once at build time and is stored with the index.
+    """
+
+    def __init__(self, min_length=3, keep=SHORT_TOKENS, stem=False, cache_size=1024):
+        self.min_length = min_length
+        self.keep = frozenset(keep)
+        self.stem = stem
+        self.analyze_query = functools.lru_cache(maxsize=cache_size)(self._analyze_query)
+
+    def signature(self):
+        """Settings that change the produced terms (part of index cache keys)"""
+        return (self.min_length, tuple(sorted(self.keep)), self.stem)
+
+    def analyze(self, text):
+        """Terms of text, in order"""
+        text = str(text).lower().translate(_ASCII_PUNCT_TABLE)
+        if not text.isascii():
+            text = _NON_WORD.sub(' ', text)
+        min_length, keep = self.min_length, self.keep
+        words = [w for w in text.split() if len(w) >= min_length or w in keep]
+        if self.stem:
+            words = [_light_stem(w) for w in words]
+        return words
+
+    def _analyze_query(self, text):
+        return tuple(self.analyze(text))
+
+
+DEFAULT_ANALYZER = Analyzer(**ANALYZER_CONFIG)
+
+
+# ============ TRIGRAM INDEX (typo and prefix matching) ============
+def _trigrams(word):
+    """Character trigrams of a word padded like pg_trgm ('  w', ' wo', ..., 'd ')"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_trigram_index(terms):
+    """trigram -> [term, ...] over a vocabulary"""
+    trigrams = defaultdict(list)
+    for term in terms:
+        for gram in _trigrams(term):
+            trigrams[gram].append(term)
+    return dict(trigrams)
+
+
+def fuzzy_terms(trigram_index, word, threshold):
+    """
+    Vocabulary terms similar to word, as [(term, similarity), ...] best first.
+
+    Similarity is trigram Jaccard, or the share of word's trigrams found in
+    the term when the term starts with word (prefix search). When one is a
+    prefix of the other the shorter needs FUZZY_PREFIX_MIN_LENGTH characters
+    unless the longer is its plural: "neumorph"/"neumorphism" and "icon"/"icons"
+    match, "mode"/"modern" and "form"/"for" do not. Only terms at or above
+    threshold are returned, so the result does not depend on what else the
+    vocabulary contains.
+    """
+    grams = _trigrams(word)
+    shared = defaultdict(int)
+    for gram in grams:
+        for term in trigram_index.get(gram, ()):
+            shared[term] += 1
+
+    # Jaccard >= threshold needs at least this many shared trigrams
+    min_shared = threshold * len(grams) / (1 + threshold)
+    matches = []
+    for term, count in shared.items():
+        if count < min_shared or term == word:
+            continue
+        if term.startswith(word):
+            if len(word) < FUZZY_PREFIX_MIN_LENGTH and term != word + "s":
+                continue
+            similarity = count / len(grams)
+        elif word.startswith(term) and len(term) < FUZZY_PREFIX_MIN_LENGTH and word != term + "s":
+            continue
+        else:
+            similarity = count / (len(grams) + len(_trigrams(term)) - count)
+        if similarity >= threshold:
+            matches.append((term, similarity))
+    matches.sort(key=lambda x: (-x[1], x[0]))
+    return matches
+
+
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """
+    BM25F ranking over one or more weighted text fields (inverted index).
 
-    def __init__(self, k1=1.5, b=0.75):
+    Field weights and per-field length normalization are folded into a
+    pseudo term frequency stored in the postings at fit time, so scoring a
+    weighted multi-field corpus costs the same as plain BM25. A single field
+    with weight 1.0 is classic BM25.
+
+    Documents can be added and removed in place. Removed documents leave a
+    tombstone slot (ids stay stable); new documents are normalized against
+    the current avg_field_lengths until renormalize() refreshes them.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, analyzer=None):
         self.k1 = k1
         self.b = b
+        self.analyzer = analyzer or DEFAULT_ANALYZER
         self.corpus = []
+        self.field_weights = []
+        self.field_lengths = []
+        self.avg_field_lengths = []
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
+        self.postings = {}
+        self.trigrams = {}
+        self.fuzzy_threshold = FUZZY_THRESHOLD
+        self.tombstones = set()
         self.N = 0
 
     def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        """Analyze document text into terms"""
+        return self.analyzer.analyze(text)
+
+    def tokenize_query(self, query):
+        """Analyze query text into terms (memoized)"""
+        return self.analyzer.analyze_query(query)
+
+    def query_terms(self, query):
+        """
+        (term, weight) pairs for a query: indexed words at weight 1.0, other
+        words expanded to similar vocabulary terms weighted by similarity.
+        """
+        terms = []
+        for token in self.tokenize_query(query):
+            if token in self.postings:
+                terms.append((token, 1.0))
+            elif self.fuzzy_threshold and len(token) >= FUZZY_MIN_LENGTH:
+                terms.extend(fuzzy_terms(self.trigrams, token, self.fuzzy_threshold))
+        return terms
+
+    def fit(self, documents, field_weights=None):
+        """
+        Build postings from documents.
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        Each document is a string or a sequence of field strings; field_weights
+        gives one weight per field (default 1.0 each).
+        """
+        self.corpus = [self._tokenize_fields(doc) for doc in documents]
+        self.tombstones = set()
         self.N = len(self.corpus)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        n_fields = len(self.corpus[0])
+        self.field_weights = list(field_weights) if field_weights is not None else [1.0] * n_fields
+        self._index_corpus()
+
+    def _tokenize_fields(self, doc):
+        return [self.tokenize(doc)] if isinstance(doc, str) else [self.tokenize(f) for f in doc]
+
+    def _index_corpus(self):
+        """Length statistics, postings, IDF and trigrams from the tokenized corpus"""
+        n_fields = len(self.field_weights)
+        self.field_lengths = [[len(field) for field in doc] for doc in self.corpus]
+        self.avg_field_lengths = [sum(lengths[f] for lengths in self.field_lengths) / self.N for f in range(n_fields)]
+        self.doc_lengths = [sum(lengths) for lengths in self.field_lengths]
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        # term -> [(doc_idx, pseudo_tf), ...] in document order
+        postings = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            for word, tf in self._pseudo_term_freqs(doc, self.field_lengths[idx]).items():
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        self.doc_freqs = defaultdict(int, ((word, len(plist)) for word, plist in self.postings.items()))
+        self._refresh_idf()
+        self.trigrams = build_trigram_index(self.postings)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+    def _refresh_idf(self):
+        N = self.N
+        self.idf = {word: log((N - len(plist) + 0.5) / (len(plist) + 0.5) + 1) for word, plist in self.postings.items()}
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    def _pseudo_term_freqs(self, fields, lengths):
+        """Weighted, length-normalized term frequencies summed over fields"""
+        term_freqs = defaultdict(float)
+        for tokens, length, weight, avg_length in zip(fields, lengths, self.field_weights, self.avg_field_lengths):
+            if not tokens or not weight:
+                continue
+            # A field empty at the last normalization has no average yet
+            norm = 1 - self.b + self.b * length / avg_length if avg_length else 1.0
+            for word in tokens:
+                term_freqs[word] += weight / norm
+        return term_freqs
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def add_documents(self, documents):
+        """
+        Append documents, updating postings, document frequencies, IDF, avgdl
+        and trigrams in place. Returns the new document ids.
+        """
+        start = len(self.corpus)
+        new_terms = []
+        for idx, doc in enumerate(documents, start):
+            fields = self._tokenize_fields(doc)
+            lengths = [len(field) for field in fields]
+            self.corpus.append(fields)
+            self.field_lengths.append(lengths)
+            self.doc_lengths.append(sum(lengths))
+            for word, tf in self._pseudo_term_freqs(fields, lengths).items():
+                plist = self.postings.get(word)
+                if plist is None:
+                    plist = self.postings[word] = []
+                    new_terms.append(word)
+                plist.append((idx, tf))
+                self.doc_freqs[word] += 1
 
-            scores.append((idx, score))
+        for term in new_terms:
+            for gram in _trigrams(term):
+                self.trigrams.setdefault(gram, []).append(term)
+        ids = list(range(start, len(self.corpus)))
+        self.N += len(ids)
+        self._refresh_stats()
+        return ids
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    def remove_documents(self, ids):
+        """Tombstone documents, dropping their postings and updating statistics in place"""
+        removed = set(ids) - self.tombstones
+        if not removed:
+            return
+        touched = set()
+        n_fields = len(self.field_weights)
+        for idx in removed:
+            for field in self.corpus[idx]:
+                touched.update(field)
+            self.corpus[idx] = [[] for _ in range(n_fields)]
+            self.field_lengths[idx] = [0] * n_fields
+            self.doc_lengths[idx] = 0
 
+        for word in touched:
+            if word not in self.postings:
+                continue  # only in zero-weight fields
+            plist = [posting for posting in self.postings[word] if posting[0] not in removed]
+            if plist:
+                self.postings[word] = plist
+                self.doc_freqs[word] = len(plist)
+                continue
+            del self.postings[word]
+            self.doc_freqs.pop(word, None)
+            for gram in _trigrams(word):
+                terms = self.trigrams.get(gram)
+                if terms is not None:
+                    terms.remove(word)
+                    if not terms:
+                        del self.trigrams[gram]
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
+        self.tombstones |= removed
+        self.N -= len(removed)
+        self._refresh_stats()
+
+    def _refresh_stats(self):
+        """avgdl and IDF after N or document frequencies changed"""
+        self.avgdl = sum(self.doc_lengths) / self.N if self.N else 0
+        self._refresh_idf()
+
+    def live_avg_field_lengths(self):
+        """Average field lengths over live documents (tombstones have length 0)"""
+        if not self.N:
+            return [0.0] * len(self.field_weights)
+        return [sum(lengths[f] for lengths in self.field_lengths) / self.N for f in range(len(self.field_weights))]
+
+    def needs_renormalize(self, tolerance=RENORMALIZE_TOLERANCE, tombstone_limit=TOMBSTONE_LIMIT):
+        """True when postings were normalized against stale averages or carry many tombstones"""
+        if len(self.tombstones) > tombstone_limit * len(self.corpus):
+            return True
+        for basis, live in zip(self.avg_field_lengths, self.live_avg_field_lengths()):
+            if (abs(live - basis) / basis if basis else live) > tolerance:
+                return True
+        return False
+
+    def renormalize(self):
+        """
+        Drop tombstones and recompute postings against current field averages,
+        reusing the stored tokens. Returns the old ids of the kept documents,
+        in their new order (new id = position).
+        """
+        keep = [idx for idx in range(len(self.corpus)) if idx not in self.tombstones]
+        self.corpus = [self.corpus[idx] for idx in keep]
+        self.tombstones = set()
+        self.N = len(self.corpus)
+        if self.N:
+            self._index_corpus()
+        else:
+            self.field_lengths, self.doc_lengths, self.avgdl = [], [], 0
+            self.postings, self.idf, self.doc_freqs, self.trigrams = {}, {}, defaultdict(int), {}
+        return keep
+
+    def term_weight(self, idf, tf):
+        """BM25 saturation of a pseudo term frequency"""
+        return idf * (tf * (self.k1 + 1)) / (tf + self.k1)
+
+    def score(self, query, top_k=None, candidates=None):
+        """
+        Score documents containing query terms, best first (top_k via heap).
+
+        candidates (a set of doc ids) restricts scoring to those documents.
+        """
+        profile = _active_profile()
+        if profile is None:
+            return self._rank(self._accumulate(self.query_terms(query), candidates), top_k)
+
+        with profile.stage("search.tokenize"):
+            terms = self.query_terms(query)
+        with profile.stage("search.score"):
+            scores = self._accumulate(terms, candidates)
+        with profile.stage("search.rank"):
+            ranked = self._rank(scores, top_k)
+        profile.count("docs_scored", len(scores))
+        profile.count("postings_touched", sum(len(self.postings[term]) for term, _ in terms))
+        return ranked
+
+    def _accumulate(self, terms, candidates=None):
+        """{doc id: score} over the postings of weighted query terms (only candidates when given)"""
+        scores = {}
+        k1 = self.k1
+        k1_plus_1 = k1 + 1
+
+        for term, weight in terms:
+            idf = self.idf[term]
+            if candidates is None:
+                for idx, tf in self.postings[term]:
+                    scores[idx] = scores.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + k1) * weight
+            else:
+                for idx, tf in self.postings[term]:
+                    if idx in candidates:
+                        scores[idx] = scores.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + k1) * weight
+        return scores
+
+    def _rank(self, scores, top_k):
+        # Ties keep document order
+        if top_k is None:
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        import heapq
+        return heapq.nlargest(top_k, scores.items(), key=lambda x: (x[1], -x[0]))
+
+    def state(self):
+        """Return the fitted index as plain data for persistence"""
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "corpus": self.corpus,
+            "field_weights": self.field_weights,
+            "field_lengths": self.field_lengths,
+            "avg_field_lengths": self.avg_field_lengths,
+            "doc_lengths": self.doc_lengths,
+            "avgdl": self.avgdl,
+            "idf": self.idf,
+            "doc_freqs": dict(self.doc_freqs),
+            "postings": self.postings,
+            "trigrams": self.trigrams,
+            "tombstones": sorted(self.tombstones),
+            "N": self.N
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a fitted index from data produced by state()"""
+        bm25 = cls(state["k1"], state["b"])
+        bm25.corpus = state["corpus"]
+        bm25.field_weights = state["field_weights"]
+        bm25.field_lengths = state["field_lengths"]
+        bm25.avg_field_lengths = state["avg_field_lengths"]
+        bm25.doc_lengths = state["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.idf = state["idf"]
+        bm25.doc_freqs = defaultdict(int, state["doc_freqs"])
+        bm25.postings = state["postings"]
+        bm25.trigrams = state["trigrams"]
+        bm25.tombstones = set(state["tombstones"])
+        bm25.N = state["N"]
+        return bm25
+
+
+# ============ VECTORIZED BM25 (optional numpy/scipy) ============
+_VECTOR_MODULES = None
+
+
+def _vector_modules():
+    """Import numpy and scipy.sparse on first use; None if not installed"""
+    global _VECTOR_MODULES
+    if _VECTOR_MODULES is None:
+        try:
+            import numpy
+            from scipy import sparse
+            _VECTOR_MODULES = (numpy, sparse)
+        except ImportError:
+            _VECTOR_MODULES = False
+    return _VECTOR_MODULES or None
+
+
+def vector_backend_available():
+    """True when numpy and scipy are installed"""
+    return _vector_modules() is not None
+
+
+class VectorBM25:
+    """BM25 over a CSR document-term matrix with precomputed term weights"""
+
+    def __init__(self, bm25):
+        np, sparse = _vector_modules()
+        self.query_terms = bm25.query_terms
+        self.vocab = {term: col for col, term in enumerate(bm25.postings)}
+
+        rows, cols, weights = [], [], []
+        for term, plist in bm25.postings.items():
+            col = self.vocab[term]
+            idf = bm25.idf[term]
+            for idx, tf in plist:
+                rows.append(idx)
+                cols.append(col)
+                weights.append(bm25.term_weight(idf, tf))
+
+        # Query-term matrix is multiplied from the right, so store terms x docs
+        self.matrix = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float64), (np.array(cols, dtype=np.int64), np.array(rows, dtype=np.int64))),
+            shape=(len(self.vocab), len(bm25.doc_lengths))
+        )
+
+    def score_batch(self, queries, top_k):
+        """Score all queries in one sparse product; return [(idx, score), ...] per query"""
+        np, sparse = _vector_modules()
+        q_rows, q_cols, q_weights = [], [], []
+        for q_idx, query in enumerate(queries):
+            for term, weight in self.query_terms(query):
+                q_rows.append(q_idx)
+                q_cols.append(self.vocab[term])
+                q_weights.append(weight)
+
+        # Repeated query terms sum their weights, matching BM25.score
+        query_matrix = sparse.csr_matrix(
+            (np.array(q_weights, dtype=np.float64), (np.array(q_rows, dtype=np.int64), np.array(q_cols, dtype=np.int64))),
+            shape=(len(queries), len(self.vocab))
+        )
+        scores = (query_matrix @ self.matrix).tocsr()
+
+        ranked = []
+        for q_idx in range(len(queries)):
+            start, end = scores.indptr[q_idx], scores.indptr[q_idx + 1]
+            docs, values = scores.indices[start:end], scores.data[start:end]
+            keep = values > 0
+            docs, values = docs[keep], values[keep]
+            if top_k <= 0:
+                ranked.append([])
+                continue
+            if top_k < len(values):
+                # Keep everything tied with the k-th score so ties resolve like BM25.score
+                part = np.argpartition(-values, top_k - 1)[:top_k]
+                keep = values >= values[part].min()
+                docs, values = docs[keep], values[keep]
+            # Best first, ties in document order
+            order = np.lexsort((docs, -values))[:top_k]
+            ranked.append([(int(docs[i]), float(values[i])) for i in order])
+        return ranked
+
+
+# ============ DENSE RETRIEVAL (optional numpy) ============
+_NUMPY = None
+
+
+def _numpy():
+    """Import numpy on first use; None if not installed"""
+    global _NUMPY
+    if _NUMPY is None:
+        try:
+            import numpy
+            _NUMPY = numpy
+        except ImportError:
+            _NUMPY = False
+    return _NUMPY or None
+
+
+def hybrid_backend_available():
+    """True when numpy is installed"""
+    return _numpy() is not None
+
+
+def _csr(np, rows, cols, values, n_rows):
+    """(indptr, indices, values) CSR arrays from coordinates"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_rows))))
+    return indptr, cols[order], values[order]
+
+
+def _csr_matmul(np, csr, dense):
+    """CSR matrix times a dense matrix (segment sums over gathered rows)"""
+    indptr, indices, values = csr
+    out = np.zeros((len(indptr) - 1, dense.shape[1]))
+    nonempty = np.flatnonzero(np.diff(indptr))
+    if len(nonempty):
+        out[nonempty] = np.add.reduceat(dense[indices] * values[:, None], indptr[nonempty], axis=0)
+    return out
+
+
+def _truncated_svd(np, rows, cols, values, shape, k, power_iterations=4):
+    """Top-k singular triplets of a sparse matrix (randomized range finder, fixed seed)"""
+    n_rows, n_cols = shape
+    matrix = _csr(np, rows, cols, values, n_rows)
+    transposed = _csr(np, cols, rows, values, n_cols)
+    rng = np.random.default_rng(0)
+    width = min(k + 10, n_rows, n_cols)
+    sample = _csr_matmul(np, matrix, rng.standard_normal((n_cols, width)))
+    for _ in range(power_iterations):
+        basis = np.linalg.qr(sample)[0]
+        basis = np.linalg.qr(_csr_matmul(np, transposed, basis))[0]
+        sample = _csr_matmul(np, matrix, basis)
+    basis = np.linalg.qr(sample)[0]
+    u, sigma, vt = np.linalg.svd(_csr_matmul(np, transposed, basis).T, full_matrices=False)
+    return (basis @ u)[:, :k], sigma[:k], vt[:k].T
+
+
+def _normalize_rows(np, matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+
+def _spherical_kmeans(np, vectors, n_lists, iterations=10):
+    """(centroids, assignment) of unit vectors, fixed seed"""
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        # Empty lists keep their previous centroid
+        filled = np.bincount(assign, minlength=n_lists) > 0
+        centroids[filled] = _normalize_rows(np, sums[filled])
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class DenseIndex:
+    """
+    LSA document vectors: a truncated SVD of the row-normalized BM25 weight
+    matrix. Queries are folded in through the term vectors and matched by
+    cosine. Collections of at least ANN_MIN_DOCS documents are partitioned
+    into sqrt(N) k-means lists (IVF); a query scans its ANN_PROBES nearest lists.
+    """
+
+    def __init__(self, vocab, term_vectors, doc_vectors, centroids=None, list_offsets=None, list_docs=None):
+        self.vocab = vocab
+        self.term_vectors = term_vectors
+        self.doc_vectors = doc_vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_docs = list_docs
+
+    @classmethod
+    def build(cls, bm25, dimensions=LSA_DIMENSIONS):
+        np = _numpy()
+        vocab = {term: col for col, term in enumerate(bm25.postings)}
+        n_docs = len(bm25.doc_lengths)
+        rows, cols, values = [], [], []
+        for term, plist in bm25.postings.items():
+            idf = bm25.idf[term]
+            for idx, tf in plist:
+                rows.append(idx)
+                cols.append(vocab[term])
+                values.append(bm25.term_weight(idf, tf))
+        rows, cols, values = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(values)
+
+        # Row-normalize so long documents do not dominate the factorization
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n_docs))
+        values = values / norms[rows]
+
+        k = min(dimensions, n_docs, len(vocab))
+        if k == 0:
+            return cls(vocab, np.zeros((len(vocab), 0)), np.zeros((n_docs, 0)))
+        u, sigma, v = _truncated_svd(np, rows, cols, values, (n_docs, len(vocab)), k)
+        doc_vectors = _normalize_rows(np, u * sigma).astype(np.float32)
+        dense = cls(vocab, v.astype(np.float32), doc_vectors)
+
+        if bm25.N >= ANN_MIN_DOCS:
+            live = np.flatnonzero(np.linalg.norm(doc_vectors, axis=1) > 0)
+            centroids, assign = _spherical_kmeans(np, doc_vectors[live], int(len(live) ** 0.5))
+            order = np.argsort(assign, kind="stable")
+            dense.centroids = centroids.astype(np.float32)
+            dense.list_docs = live[order]
+            dense.list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids)))))
+        return dense
+
+    def search(self, bm25, query, top_k):
+        """Document ids by cosine with the folded-in query, best first"""
+        np = _numpy()
+        query_vector = np.zeros(self.term_vectors.shape[1], dtype=np.float32)
+        for term, weight in bm25.query_terms(query):
+            col = self.vocab.get(term)
+            if col is not None:
+                query_vector += self.term_vectors[col] * (bm25.idf[term] * weight)
+        norm = np.linalg.norm(query_vector)
+        if not norm:
+            return []
+        query_vector /= norm
+
+        if self.centroids is None:
+            candidates = np.arange(len(self.doc_vectors))
+        else:
+            probes = np.argsort(-(self.centroids @ query_vector))[:ANN_PROBES]
+            candidates = np.concatenate([self.list_docs[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes])
+        scores = self.doc_vectors[candidates] @ query_vector
+        keep = scores > 0
+        candidates, scores = candidates[keep], scores[keep]
+        if top_k < len(scores):
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[top], scores[top]
+        # Best first, ties in document order
+        order = np.lexsort((candidates, -scores))
+        return candidates[order].tolist()
+
+    def state(self):
+        return {
+            "vocab": self.vocab,
+            "term_vectors": self.term_vectors,
+            "doc_vectors": self.doc_vectors,
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_docs": self.list_docs
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(**state)
+
+
+def _load_dense(filepath, bm25, generation, config):
+    """DenseIndex for a CSV index, from its on-disk artifact when built for the same index generation and config"""
+    path = artifact_path(filepath, ".dense")
+    stored = read_artifact(path)
+    if (stored is not None and stored["dense_version"] == DENSE_VERSION
+            and stored["generation"] == generation and stored["config"] == config):
+        return DenseIndex.from_state(stored["dense"])
+    dense = DenseIndex.build(bm25)
+    write_artifact(path, {"version": INDEX_VERSION, "dense_version": DENSE_VERSION, "generation": generation,
+                         "config": config, "dense": dense.state()})
+    return dense
+
+
+def _hybrid_rank(index, query, max_results):
+    """Row ids by reciprocal-rank fusion of the BM25 and dense rankings"""
+    lexical = [idx for idx, score in index.bm25.score(query, top_k=HYBRID_CANDIDATES) if score > 0]
+    semantic = index.dense().search(index.bm25, query, HYBRID_CANDIDATES)
+    fused = defaultdict(float)
+    for ranking in (lexical, semantic):
+        for rank, idx in enumerate(ranking, 1):
+            fused[idx] += 1 / (RRF_K + rank)
+    import heapq
+    return [idx for idx, _ in heapq.nlargest(max_results, fused.items(), key=lambda x: (x[1], -x[0]))]
+
+
+# ============ ROW STORE ============
+class RowStore:
+    """
+    Result columns stored column-wise: one list of interned strings per
+    output column, rows addressed by integer id. Only the rows that make
+    it into a result are turned into dicts.
+    """
+
+    def __init__(self, columns, values):
+        self.columns = columns
+        self.values = values
+
+    @classmethod
+    def from_records(cls, records, fieldnames, output_cols):
+        """Build from csv.DictReader records, keeping output columns present in the header"""
+        columns = [col for col in output_cols if col in fieldnames]
+        rows = cls(columns, [[] for _ in columns])
+        rows.extend(records)
+        return rows
+
+    def extend(self, records):
+        """Append csv.DictReader records as new rows"""
+        for record in records:
+            for col, column in zip(self.columns, self.values):
+                value = record.get(col, "")
+                column.append(sys.intern(value) if isinstance(value, str) else value)
+
+    def compact(self, keep):
+        """Keep only the rows at ids keep, renumbered in that order"""
+        self.values = [[column[idx] for idx in keep] for column in self.values]
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+    def row(self, idx):
+        """Materialize one row as {column: value}"""
+        return {col: column[idx] for col, column in zip(self.columns, self.values)}
+
+    def state(self):
+        """Plain data for persistence (pickle keeps shared strings shared)"""
+        return {"columns": self.columns, "values": self.values}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["columns"], state["values"])
+
+
+# ============ FACETS ============
+def _popcount(mask):
+    return mask.bit_count() if hasattr(mask, "bit_count") else bin(mask).count("1")
+
+
+def _normalize_where(where):
+    """{column: [values]} from {column: value or values}, "Col=Value" strings or (column, value) pairs"""
+    if not where:
+        return {}
+    if isinstance(where, str):
+        where = [where]
+    if isinstance(where, dict):
+        items = where.items()
+    else:
+        items = [tuple(item.split("=", 1)) if isinstance(item, str) else tuple(item) for item in where]
+    normalized = {}
+    for item in items:
+        if len(item) != 2:
+            raise ValueError(f"Invalid filter {'='.join(item)!r}; expected Column=Value")
+        column, values = item
+        values = [values] if isinstance(values, str) else list(values)
+        normalized.setdefault(column.strip(), []).extend(str(value).strip() for value in values)
+    return normalized
+
+
+class FacetIndex:
+    """
+    Row bitmaps (Python ints, bit i = row i) per value of categorical columns.
+
+    Values match case-insensitively. Filters OR the values given for one
+    column and AND the columns; the result is a candidate mask that scoring
+    and facet counts (popcounts) work from. Tombstoned rows are masked out.
+    """
+
+    def __init__(self, rows, columns, tombstones=()):
+        self.columns = [col for col in columns if col in rows.columns]
+        self.bitmaps = {}
+        self.labels = {}
+        for col in self.columns:
+            ids = defaultdict(list)
+            labels = {}
+            for idx, value in enumerate(rows.values[rows.columns.index(col)]):
+                if value:
+                    key = value.strip().lower()
+                    ids[key].append(idx)
+                    labels.setdefault(key, value.strip())
+            self.bitmaps[col] = {key: self._bitmap(found, len(rows)) for key, found in ids.items()}
+            self.labels[col] = labels
+        self.live = (1 << len(rows)) - 1
+        for idx in tombstones:
+            self.live &= ~(1 << idx)
+
+    @staticmethod
+    def _bitmap(ids, size):
+        bits = bytearray((size + 7) // 8)
+        for idx in ids:
+            bits[idx >> 3] |= 1 << (idx & 7)
+        return int.from_bytes(bits, 'little')
+
+    @staticmethod
+    def ids(mask):
+        """Row ids set in mask, ascending"""
+        found = []
+        while mask:
+            low = mask & -mask
+            found.append(low.bit_length() - 1)
+            mask ^= low
+        return found
+
+    def column(self, name):
+        """Facet column matching name case-insensitively, or None"""
+        lowered = name.lower()
+        return next((col for col in self.columns if col.lower() == lowered), None)
+
+    def resolve(self, where):
+        """{facet column: sorted lowercase values}, merging names that differ only in case; KeyError for unknown columns"""
+        resolved = defaultdict(set)
+        for name, values in where.items():
+            col = self.column(name)
+            if col is None:
+                raise KeyError(name)
+            resolved[col].update(value.lower() for value in values)
+        return {col: sorted(values) for col, values in sorted(resolved.items())}
+
+    def mask(self, where):
+        """Candidate mask for resolve()d filters"""
+        mask = self.live
+        for col, values in where.items():
+            column_mask = 0
+            for value in values:
+                column_mask |= self.bitmaps[col].get(value, 0)
+            mask &= column_mask
+        return mask
+
+    def counts(self, mask):
+        """{column: {value: rows in mask}} for every facet column, largest first"""
+        counts = {}
+        for col in self.columns:
+            found = [(self.labels[col][key], _popcount(bitmap & mask)) for key, bitmap in self.bitmaps[col].items()]
+            counts[col] = dict(sorted((item for item in found if item[1]), key=lambda item: -item[1]))
+        return counts
+
+
+# ============ INDEX CACHE ============
+def artifact_path(filepath, suffix=".idx"):
+    """Location of an on-disk artifact for a CSV file (.idx index, .dense vectors, ...)"""
+    filepath = Path(filepath).resolve()
+    try:
+        # Shipped data: mirror its layout (stacks/react.csv -> stacks--react.idx)
+        relative = filepath.relative_to(DATA_DIR.resolve())
+        return INDEX_DIR / ("--".join(relative.with_suffix("").parts) + suffix)
+    except ValueError:
+        import hashlib
+        digest = hashlib.sha1(str(filepath).encode("utf-8")).hexdigest()[:10]
+        return INDEX_DIR / "external" / f"{filepath.stem}-{digest}{suffix}"
+
+
+def read_artifact(path):
+    """Read a pickled artifact (index or cache), returning None if missing, unreadable or from another INDEX_VERSION"""
+    import pickle
+    try:
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def write_artifact(path, obj):
+    """Atomically pickle obj to path (best effort, caches only)"""
+    import pickle
+    import tempfile
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per call: threads of one process may write the same artifact
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as f:
+            tmp = f.name
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def parse_csv(raw, search_cols):
+    """(fieldnames, records, documents) with one document field per search column"""
+    import csv
+    import io
+    reader = csv.DictReader(io.StringIO(raw.decode('utf-8')))
+    data = list(reader)
+    documents = [[str(row.get(col, "")) for col in search_cols] for row in data]
+    return reader.fieldnames or [], data, documents
+
+
+def _row_fingerprints(documents, records, columns):
+    """Stable per-row digest of everything the index stores for it"""
+    import hashlib
+    return [hashlib.blake2b("\x1f".join(document + [str(record.get(col)) for col in columns]).encode('utf-8'),
+                            digest_size=8).digest()
+            for document, record in zip(documents, records)]
+
+
+def _build_index(raw, search_cols, output_cols, search_weights):
+    """Parse CSV content, tokenize search columns and fit BM25F"""
+    fieldnames, data, documents = parse_csv(raw, search_cols)
+
+    bm25 = BM25()
+    bm25.fit(documents, [search_weights.get(col, 1.0) for col in search_cols])
+
+    # Keep only the columns that can appear in results
+    rows = RowStore.from_records(data, fieldnames, output_cols)
+    return {
+        "fieldnames": fieldnames,
+        "bm25": bm25.state(),
+        "rows": rows.state(),
+        "fingerprints": _row_fingerprints(documents, data, rows.columns)
+    }
+
+
+def _update_index(index, raw, search_cols):
+    """
+    Apply a CSV edit to a stored index in place by row fingerprint diff.
+
+    Rows whose fingerprint disappeared are tombstoned, new fingerprints are
+    appended as documents (a changed row is both). Returns False when the
+    header changed or the edit is large enough that a rebuild is cheaper.
+    """
+    fieldnames, data, documents = parse_csv(raw, search_cols)
+    if fieldnames != index["fieldnames"] or not index["bm25"]["N"]:
+        return False
+
+    bm25 = BM25.from_state(index["bm25"])
+    rows = RowStore.from_state(index["rows"])
+    fingerprints = index["fingerprints"]
+    current = _row_fingerprints(documents, data, rows.columns)
+
+    # Match rows by fingerprint (duplicates pair up in order)
+    slots = defaultdict(list)
+    for idx in reversed(range(len(fingerprints))):
+        if fingerprints[idx] is not None:
+            slots[fingerprints[idx]].append(idx)
+    added = []
+    for i, fingerprint in enumerate(current):
+        free = slots.get(fingerprint)
+        if free:
+            free.pop()
+        else:
+            added.append(i)
+    removed = [idx for free in slots.values() for idx in free]
+
+    if len(added) + len(removed) > INCREMENTAL_MAX_CHANGE * bm25.N:
+        return False
+
+    bm25.remove_documents(removed)
+    for idx in removed:
+        fingerprints[idx] = None
+    bm25.add_documents([documents[i] for i in added])
+    rows.extend([data[i] for i in added])
+    fingerprints.extend(current[i] for i in added)
+
+    if bm25.needs_renormalize():
+        keep = bm25.renormalize()
+        rows.compact(keep)
+        fingerprints = [fingerprints[idx] for idx in keep]
+
+    index["bm25"] = bm25.state()
+    index["rows"] = rows.state()
+    index["fingerprints"] = fingerprints
+    return True
+
+
+def _index_config(search_cols, output_cols, search_weights):
+    """Everything besides the CSV content that an index artifact depends on"""
+    return (tuple(search_cols), tuple(output_cols), tuple(sorted(search_weights.items())), DEFAULT_ANALYZER.signature())
+
+
+def _load_index(filepath, search_cols, output_cols, search_weights):
+    """
+    Return (bm25, rows, generation) for a CSV, using the on-disk artifact when fresh.
+
+    The artifact is trusted while the CSV's mtime and size are unchanged;
+    otherwise the content hash decides whether it is stale. A stale artifact
+    is updated incrementally (_update_index) when possible, else rebuilt.
+    Either way it gets a new generation id: row ids are only meaningful
+    within one generation, so caches of row ids are keyed on it.
+    """
+    config = _index_config(search_cols, output_cols, search_weights)
+    stat = os.stat(filepath)
+    path = artifact_path(filepath)
+    with profile_stage("index.read_artifact"):
+        index = read_artifact(path)
+
+    if index is not None and index["config"] == config:
+        if index["mtime_ns"] == stat.st_mtime_ns and index["size"] == stat.st_size:
+            profile_count("index_loads")
+            with profile_stage("index.read_artifact"):
+                return BM25.from_state(index["bm25"]), RowStore.from_state(index["rows"]), index["generation"]
+    else:
+        index = None
+
+    import hashlib
+    with profile_stage("index.read_csv"):
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+
+    if index is None or index["sha256"] != content_hash:
+        with profile_stage("index.update"):
+            updated = index is not None and _update_index(index, raw, search_cols)
+        if updated:
+            profile_count("index_updates")
+        else:
+            profile_count("index_builds")
+            with profile_stage("index.build"):
+                index = {"version": INDEX_VERSION, "config": config,
+                         **_build_index(raw, search_cols, output_cols, search_weights)}
+        index["sha256"] = content_hash
+        index["generation"] = os.urandom(8).hex()
+
+    # Content unchanged (or freshly built): record current file stats
+    index["mtime_ns"] = stat.st_mtime_ns
+    index["size"] = stat.st_size
+    with profile_stage("index.write_artifact"):
+        write_artifact(path, index)
+    return BM25.from_state(index["bm25"]), RowStore.from_state(index["rows"]), index["generation"]
+
+
+class SearchIndex:
+    """A loaded CSV index: BM25 postings, result rows and derived engines"""
+
+    def __init__(self, key, bm25, rows, stamp, generation):
+        self.key = key
+        self.bm25 = bm25
+        self.rows = rows
+        self.stamp = stamp
+        self.generation = generation
+        self._vector = None
+        self._dense = None
+        self._facets = {}
+
+    def vector(self):
+        """Vectorized engine for this index, built on first use"""
+        if self._vector is None:
+            self._vector = VectorBM25(self.bm25)
+        return self._vector
+
+    def dense(self):
+        """LSA/IVF engine for hybrid search, loaded or built on first use"""
+        if self._dense is None:
+            config = _index_config(self.key[1], self.key[2], dict(self.key[3]))
+            self._dense = _load_dense(self.key[0], self.bm25, self.generation, config)
+        return self._dense
+
+    def facets(self, columns):
+        """FacetIndex over columns, built on first use"""
+        columns = tuple(columns)
+        if columns not in self._facets:
+            with profile_stage("index.facets"):
+                self._facets[columns] = FacetIndex(self.rows, columns, self.bm25.tombstones)
+        return self._facets[columns]
+
+
+_LOADED_INDEXES = {}
+
+
+def _get_index(filepath, search_cols, output_cols, search_weights=None):
+    """Process-wide SearchIndex for a CSV, reloaded when the file changes"""
+    search_weights = search_weights or {}
+    key = (str(filepath), tuple(search_cols), tuple(output_cols), tuple(sorted(search_weights.items())))
+    stat = os.stat(filepath)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    index = _LOADED_INDEXES.get(key)
+    if index is None or index.stamp != stamp:
+        bm25, rows, generation = _load_index(filepath, search_cols, output_cols, search_weights)
+        index = SearchIndex(key, bm25, rows, stamp, generation)
+        _LOADED_INDEXES[key] = index
+    return index
+
+
+def _index_parts(tags=None):
+    """(tag, SearchIndex) for every domain and stack CSV that exists, or just those in tags"""
+    parts = []
+    for domain, config in CSV_CONFIG.items():
+        filepath = DATA_DIR / config["file"]
+        if (tags is None or domain in tags) and filepath.exists():
+            parts.append((domain, _get_index(filepath, config["search_cols"], config["output_cols"], config.get("search_weights"))))
+    for stack, config in STACK_CONFIG.items():
+        filepath = DATA_DIR / config["file"]
+        if (tags is None or stack_tag(stack) in tags) and filepath.exists():
+            parts.append((stack_tag(stack), _get_index(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], _STACK_COLS["search_weights"])))
+    return parts
+
+
+def preload_indexes(domains=None):
+    """
+    Load indexes into the process: those of the given domains, or every
+    domain and stack index (for resident servers) when domains is None.
+    """
+    if domains is None:
+        _get_global_index()
+        return
+    for domain in domains:
+        config = CSV_CONFIG[domain]
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _get_index(filepath, config["search_cols"], config["output_cols"], config.get("search_weights"))
+
+
+# ============ GLOBAL INDEX ============
+def stack_tag(stack):
+    """Global index tag for a stack (domain tags are the domain names)"""
+    return f"stack:{stack}"
+
+
+class GlobalIndex:
+    """
+    One postings table over a set of domain and stack CSVs, tagged per document.
+
+    IDF is domain-aware: each posting carries its BM25 weight computed with
+    its own tag's document frequencies and length statistics rather than the
+    pooled corpus', so the ranking within a tag matches searching that CSV
+    alone while a single pass scores all of them. Postings are merged per term
+    on first use, so building the table costs nothing up front.
+    """
+
+    def __init__(self, parts):
+        self.tags = [tag for tag, _ in parts]
+        self.indexes = [index for _, index in parts]
+        self.offsets = []
+        self.doc_parts = []
+        self.postings = {}
+        self.tokenize_query = self.indexes[0].bm25.tokenize_query if parts else BM25().tokenize_query
+        self.fuzzy_threshold = self.indexes[0].bm25.fuzzy_threshold if parts else FUZZY_THRESHOLD
+
+        gid = 0
+        for part, index in enumerate(self.indexes):
+            self.offsets.append(gid)
+            # Tombstoned slots keep their ids, so count slots rather than live docs
+            slots = len(index.bm25.doc_lengths)
+            self.doc_parts.extend([part] * slots)
+            gid += slots
+
+    def term_postings(self, term):
+        """[(global_id, weight), ...] for term across every part (merged once, then memoized)"""
+        plist = self.postings.get(term)
+        if plist is None:
+            plist = []
+            for offset, index in zip(self.offsets, self.indexes):
+                bm25 = index.bm25
+                if term in bm25.postings:
+                    idf = bm25.idf[term]
+                    plist.extend((offset + idx, bm25.term_weight(idf, tf)) for idx, tf in bm25.postings[term])
+            self.postings[term] = plist
+        return plist
+
+    def score(self, query, limits):
+        """Score once, return {tag: [(row_idx, score), ...]} best first, top limits[tag] per tag"""
+        part_limits = {part: limits[tag] for part, tag in enumerate(self.tags) if tag in limits}
+        scores = {}
+        touched = 0
+        for token in self.tokenize_query(query):
+            plist = self.term_postings(token)
+            touched += len(plist)
+            for gid, weight in plist:
+                scores[gid] = scores.get(gid, 0) + weight
+            if not self.fuzzy_threshold or len(token) < FUZZY_MIN_LENGTH:
+                continue
+            # Fuzzy expansion only fills in for the parts that lack the exact
+            # word, from their own vocabulary, as their own BM25 would
+            for offset, index in zip(self.offsets, self.indexes):
+                bm25 = index.bm25
+                if token in bm25.postings:
+                    continue
+                for term, similarity in fuzzy_terms(bm25.trigrams, token, self.fuzzy_threshold):
+                    idf = bm25.idf[term]
+                    touched += len(bm25.postings[term])
+                    for idx, tf in bm25.postings[term]:
+                        gid = offset + idx
+                        scores[gid] = scores.get(gid, 0) + bm25.term_weight(idf, tf) * similarity
+        profile_count("docs_scored", len(scores))
+        profile_count("postings_touched", touched)
+
+        buckets = defaultdict(list)
+        for gid, score in scores.items():
+            part = self.doc_parts[gid]
+            if part in part_limits:
+                buckets[part].append((gid - self.offsets[part], score))
+
+        # Ties keep document order, as in BM25.score
+        import heapq
+        return {
+            self.tags[part]: heapq.nlargest(k, buckets.get(part, ()), key=lambda x: (x[1], -x[0]))
+            for part, k in part_limits.items()
+        }
+
+
+# GlobalIndex per tag set (None: every CSV)
+_GLOBAL_INDEXES = {}
+
+
+def _get_global_index(tags=None):
+    """Process-wide GlobalIndex over tags (default every CSV), rebuilt when any underlying CSV index reloads"""
+    key = None if tags is None else tuple(sorted(tags))
+    parts = _index_parts(key)
+    current = _GLOBAL_INDEXES.get(key)
+    if (current is None or current.tags != [tag for tag, _ in parts]
+            or any(a is not b for a, (_, b) in zip(current.indexes, parts))):
+        with profile_stage("index.global"):
+            _GLOBAL_INDEXES[key] = current = GlobalIndex(parts)
+    return current
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """
+    LRU cache of ranked row ids keyed by index, normalized query tokens and max_results.
+
+    Entries remember the index generation they were computed from and are
+    dropped on lookup once the index has been updated or rebuilt, since row
+    ids from one generation can point at different rows in another.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = _thread.allocate_lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(index, query, max_results, mode="bm25"):
+        """Cache key: word order and punctuation do not matter, repeated words do"""
+        return (index.key, tuple(sorted(index.bm25.tokenize_query(query))), max_results, mode)
+
+    def get(self, key, generation):
+        """Cached row ids or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != generation:
+                del self._entries[key]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                profile_count("cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            profile_count("cache_hits")
+            return entry[1]
+
+    def put(self, key, generation, row_ids):
+        with self._lock:
+            self._entries[key] = (generation, row_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def load(self, path=RESULT_CACHE_FILE):
+        """Merge entries and counters persisted by save() (missing file is fine)"""
+        import pickle
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return
+        if not isinstance(saved, dict) or saved.get("version") != INDEX_VERSION:
+            return
+        with self._lock:
+            for key, entry in saved["entries"]:
+                self._entries.setdefault(key, entry)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            for name in ("hits", "misses", "evictions", "invalidations"):
+                setattr(self, name, getattr(self, name) + saved["stats"].get(name, 0))
+
+    def save(self, path=RESULT_CACHE_FILE):
+        """Persist entries and counters so later processes can reuse them"""
+        with self._lock:
+            saved = {
+                "version": INDEX_VERSION,
+                "entries": list(self._entries.items()),
+                "stats": {name: getattr(self, name) for name in ("hits", "misses", "evictions", "invalidations")}
+            }
+        write_artifact(Path(path), saved)
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cache_stats():
+    """Counters of the process-wide result cache"""
+    return RESULT_CACHE.stats()
+
+
+# ============ PROFILING ============
+class Profile:
+    """
+    Stage timings (ms) and counters (docs scored, postings touched, cache
+    hits, ...) collected while profiled() is active.
+
+    Stages sharing a prefix do not overlap: index.* and search.* cover the
+    engine, design.* the generator phases that call into it. Work fanned out
+    to worker threads is summed, so stages can add up to more than total.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.total_ms = 0.0
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._lock = _thread.allocate_lock()
+
+    def stage(self, name):
+        """Context manager adding the block's wall time to stages[name]"""
+        return _Stage(self, name)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self):
+        """JSON-ready snapshot"""
+        with self._lock:
+            return {
+                "label": self.label,
+                "total_ms": round(self.total_ms, 3),
+                "stages_ms": {name: round(ms, 3) for name, ms in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items()))
+            }
+
+
+class _Stage:
+    """Times one block into Profile.stages"""
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        with self.profile._lock:
+            self.profile.stages[self.name] += elapsed
+        return False
+
+
+class _NoStage:
+    """Do-nothing context manager, returned when nothing is being profiled"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+# The ContextVar holding the active Profile, created by the first profiled()
+# block so that importing core does not pay for contextvars
+_ACTIVE_PROFILE = {}
+_PROFILE_HOOKS = []
+_NO_STAGE = _NoStage()
+
+
+def _profile_var():
+    """ContextVar of the active Profile, created on first use"""
+    var = _ACTIVE_PROFILE.get("var")
+    if var is None:
+        import contextvars
+        # setdefault: threads racing here all end up with the same variable
+        var = _ACTIVE_PROFILE.setdefault("var", contextvars.ContextVar("uipro_profile", default=None))
+    return var
+
+
+def _active_profile():
+    var = _ACTIVE_PROFILE.get("var")
+    return None if var is None else var.get()
+
+
+def profile_stage(name):
+    """Time a block into the active profile (no-op when not profiling)"""
+    profile = _active_profile()
+    return _NO_STAGE if profile is None else profile.stage(name)
+
+
+def profile_count(name, n=1):
+    """Add n to a counter of the active profile (no-op when not profiling)"""
+    profile = _active_profile()
+    if profile is not None:
+        profile.count(name, n)
+
+
+def profile_worker(func):
+    """Wrap func so pool threads report into the caller's active profile"""
+    profile = _active_profile()
+    if profile is None:
+        return func
+
+    def run(*args):
+        var = _profile_var()
+        token = var.set(profile)
+        try:
+            return func(*args)
+        finally:
+            var.reset(token)
+    return run
+
+
+class _Profiled:
+    """Context manager behind profiled()"""
+
+    def __init__(self, label):
+        self.profile = Profile(label)
+
+    def __enter__(self):
+        self.var = _profile_var()
+        self.token = self.var.set(self.profile)
+        self.start = time.perf_counter()
+        return self.profile
+
+    def __exit__(self, *exc):
+        profile = self.profile
+        profile.total_ms = (time.perf_counter() - self.start) * 1000
+        self.var.reset(self.token)
+        if _PROFILE_HOOKS:
+            report = profile.report()
+            for hook in list(_PROFILE_HOOKS):
+                hook(report)
+        return False
+
+
+def profiled(label=None, enabled=True):
+    """
+    Profile everything run inside the block; yields the Profile.
+
+    On exit its report() is passed to every add_profile_hook() callback.
+    enabled=False profiles nothing and yields None.
+    """
+    return _Profiled(label) if enabled else _NO_STAGE
+
+
+def add_profile_hook(hook):
+    """Call hook(report) after every profiled() block (e.g. a ProfileHistogram)"""
+    _PROFILE_HOOKS.append(hook)
+
+
+def remove_profile_hook(hook):
+    if hook in _PROFILE_HOOKS:
+        _PROFILE_HOOKS.remove(hook)
+
+
+class ProfileHistogram:
+    """
+    Profile hook aggregating reports per label: power-of-two millisecond
+    buckets for total and every stage, summed counters.
+    """
+
+    def __init__(self):
+        self._lock = _thread.allocate_lock()
+        self._labels = {}
+
+    @staticmethod
+    def bucket(ms):
+        """Upper bound (ms) of the power-of-two bucket holding ms"""
+        if ms <= 0:
+            return 0
+        mantissa, exponent = frexp(ms)
+        return 2.0 ** (exponent if mantissa > 0.5 else exponent - 1)
+
+    def __call__(self, report):
+        with self._lock:
+            entry = self._labels.setdefault(report["label"], {"calls": 0, "stages": {}, "counters": defaultdict(int)})
+            entry["calls"] += 1
+            for name, ms in [("total", report["total_ms"])] + list(report["stages_ms"].items()):
+                buckets = entry["stages"].setdefault(name, defaultdict(int))
+                buckets[self.bucket(ms)] += 1
+            for name, n in report["counters"].items():
+                entry["counters"][name] += n
+
+    def snapshot(self):
+        """{label: {"calls", "stages": {stage: {"<=Nms": count}}, "counters"}}"""
+        with self._lock:
+            return {
+                str(label): {
+                    "calls": entry["calls"],
+                    "stages": {name: {f"<={bound:g}ms": n for bound, n in sorted(buckets.items())}
+                               for name, buckets in entry["stages"].items()},
+                    "counters": dict(entry["counters"])
+                }
+                for label, entry in self._labels.items()
+            }
+
+
+# ============ DOMAIN ROUTING ============
+class DomainRouter:
+    """
+    Aho-Corasick automaton over the domain keywords.
+
+    One left-to-right pass over the text finds every keyword occurrence,
+    overlapping ones included ("svg icon" also contains "icon"), so the
+    scores equal counting `keyword in text` per keyword. Only goto edges
+    are stored (failure links are followed at match time), which keeps the
+    pickled automaton small enough to load faster than the file parses.
+    """
+
+    def __init__(self, keywords):
+        self.domains = list(keywords)
+        # One entry per (domain, keyword) so a keyword listed twice counts twice
+        self.entry_domains = []
+        transitions, outputs = [{}], [set()]
+        for domain, words in keywords.items():
+            for word in words:
+                state = 0
+                for ch in word:
+                    if ch not in transitions[state]:
+                        transitions.append({})
+                        outputs.append(set())
+                        transitions[state][ch] = len(transitions) - 1
+                    state = transitions[state][ch]
+                outputs[state].add(len(self.entry_domains))
+                self.entry_domains.append(domain)
+
+        # Breadth-first: a state's failure target is complete before its children
+        fail = [0] * len(transitions)
+        queue = list(transitions[0].values())
+        for state in queue:
+            for ch, child in transitions[state].items():
+                if state:
+                    target = fail[state]
+                    while target and ch not in transitions[target]:
+                        target = fail[target]
+                    fail[child] = transitions[target].get(ch, 0)
+                outputs[child] |= outputs[fail[child]]
+                queue.append(child)
+        self.transitions = transitions
+        self.fail = fail
+        self.outputs = [tuple(sorted(entries)) for entries in outputs]
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Parse the two-column keyword file: `domain,"kw, kw, ..."` per line
+        after a header (keywords never contain quotes, so no csv module).
+        """
+        keywords = {}
+        for line in text.splitlines()[1:]:
+            domain, _, words = line.partition(",")
+            words = [kw.strip().lower() for kw in words.strip().strip('"').split(",")]
+            if domain.strip():
+                keywords.setdefault(domain.strip(), []).extend(kw for kw in words if kw)
+        return cls(keywords)
+
+    def state(self):
+        return {
+            "domains": self.domains,
+            "entry_domains": self.entry_domains,
+            "transitions": self.transitions,
+            "fail": self.fail,
+            "outputs": self.outputs
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        router = cls.__new__(cls)
+        router.__dict__.update(state)
+        return router
+
+    def matches(self, text):
+        """Ids of the (domain, keyword) entries occurring in lowercase text"""
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        hit_states = set()
+        state = 0
+        for ch in text:
+            while state and ch not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(ch, 0)
+            if outputs[state]:
+                hit_states.add(state)
+        return set().union(*(outputs[state] for state in hit_states))
+
+    def scores(self, query):
+        """Keyword hit count for every domain, in file order"""
+        scores = dict.fromkeys(self.domains, 0)
+        for entry in self.matches(query.lower()):
+            scores[self.entry_domains[entry]] += 1
+        return scores
+
+
+_DOMAIN_ROUTER = None
+
+
+def _load_domain_router(filepath):
+    """DomainRouter for a keyword file, from its compiled artifact while the file's mtime and size match"""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return DomainRouter({})
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    path = artifact_path(filepath)
+    stored = read_artifact(path)
+    if stored is not None and stored["stamp"] == stamp:
+        return DomainRouter.from_state(stored["router"])
     with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+        router = DomainRouter.from_text(f.read())
+    write_artifact(path, {"version": INDEX_VERSION, "stamp": stamp, "router": router.state()})
+    return router
+
+
+def domain_router():
+    """
+    Process-wide DomainRouter for DATA_DIR's keyword file.
+
+    The file is checked once per process: edits reach new processes (the
+    compiled automaton in INDEX_DIR is rebuilt then), not running ones.
+    """
+    global _DOMAIN_ROUTER
+    current = _DOMAIN_ROUTER
+    if current is None or current[0] != DATA_DIR:
+        router = _load_domain_router(os.path.join(DATA_DIR, DOMAIN_KEYWORDS_FILE))
+        _DOMAIN_ROUTER = current = (DATA_DIR, router)
+    return current[1]
+
+
+def domain_scores(query):
+    """Keyword hit count per domain for query (all domains, one pass)"""
+    return domain_router().scores(query)
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+# ============ SEARCH FUNCTIONS ============
+def _search_csv(filepath, search_cols, output_cols, query, max_results, search_weights=None, hybrid=False):
+    """Core search function using BM25F (fused with dense retrieval when hybrid and numpy is installed)"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
+    # Load (or build) the precompiled index
+    index = _get_index(filepath, search_cols, output_cols, search_weights)
+    hybrid = hybrid and hybrid_backend_available()
+    with profile_stage("search.tokenize"):
+        key = ResultCache.key(index, query, max_results, "hybrid" if hybrid else "bm25")
+    row_ids = RESULT_CACHE.get(key, index.generation)
+    if row_ids is None:
+        if hybrid:
+            with profile_stage("search.hybrid"):
+                row_ids = _hybrid_rank(index, query, max_results)
+        else:
+            # Get top results with score > 0
+            row_ids = [idx for idx, score in index.bm25.score(query, top_k=max_results) if score > 0]
+        RESULT_CACHE.put(key, index.generation, row_ids)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    with profile_stage("search.rows"):
+        return [index.rows.row(idx) for idx in row_ids]
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+def _search_csv_batch(filepath, search_cols, output_cols, queries, max_results, search_weights=None):
+    """Batch variant of _search_csv; vectorized when numpy/scipy are installed"""
+    if not filepath.exists():
+        return [[] for _ in queries]
+
+    index = _get_index(filepath, search_cols, output_cols, search_weights)
+    keys = [ResultCache.key(index, query, max_results) for query in queries]
+    found = [RESULT_CACHE.get(key, index.generation) for key in keys]
 
-    return results
+    # Score only the cache misses
+    missing = [i for i, row_ids in enumerate(found) if row_ids is None]
+    if len(missing) > 1 and vector_backend_available():
+        with profile_stage("search.score_batch"):
+            ranked_lists = index.vector().score_batch([queries[i] for i in missing], max_results)
+    else:
+        ranked_lists = [index.bm25.score(queries[i], top_k=max_results) for i in missing]
+
+    for i, ranked in zip(missing, ranked_lists):
+        found[i] = [idx for idx, score in ranked if score > 0]
+        RESULT_CACHE.put(keys[i], index.generation, found[i])
+
+    with profile_stage("search.rows"):
+        return [[index.rows.row(idx) for idx in row_ids] for row_ids in found]
+
+
+def _search_faceted(filepath, search_cols, output_cols, query, max_results, search_weights, facet_cols, where, facets):
+    """
+    _search_csv restricted to rows matching where ({column: [values]}), scoring
+    only those candidates. Returns {"results": rows[, "facets": counts]} or
+    {"error": ...}; counts are over the rows the query matched within the filter.
+    """
+    if isinstance(max_results, bool) or not isinstance(max_results, int) or max_results < 1:
+        return {"error": f"Invalid max_results: {max_results!r} (must be a positive integer)"}
+    if not filepath.exists():
+        return {"results": [], **({"facets": {}} if facets else {})}
+    if where and not facet_cols:
+        return {"error": "No facet columns configured for this source"}
+
+    index = _get_index(filepath, search_cols, output_cols, search_weights)
+    facet_index = index.facets(facet_cols or ())
+    try:
+        with profile_stage("search.filter"):
+            where = facet_index.resolve(where)
+            mask = facet_index.mask(where)
+    except KeyError as e:
+        return {"error": f"Unknown facet column: {e.args[0]}. Available: {', '.join(facet_index.columns)}"}
+
+    with profile_stage("search.tokenize"):
+        mode = ("bm25", tuple((col, tuple(values)) for col, values in where.items()))
+        key = ResultCache.key(index, query, max_results, mode)
+    row_ids = None if facets else RESULT_CACHE.get(key, index.generation)
+    counts = None
+    if row_ids is None:
+        candidates = None if mask == facet_index.live else set(FacetIndex.ids(mask))
+        profile_count("candidates", len(candidates) if candidates is not None else len(index.rows))
+        # Facet counts need every hit, not just the top max_results
+        ranked = index.bm25.score(query, top_k=None if facets else max_results, candidates=candidates)
+        row_ids = [idx for idx, score in ranked[:max_results] if score > 0]
+        RESULT_CACHE.put(key, index.generation, row_ids)
+        if facets:
+            with profile_stage("search.facets"):
+                hits = FacetIndex._bitmap([idx for idx, score in ranked if score > 0], len(index.rows))
+                counts = facet_index.counts(hits & mask)
+
+    with profile_stage("search.rows"):
+        found = {"results": [index.rows.row(idx) for idx in row_ids]}
+    if facets:
+        found["facets"] = counts
+    return found
 
 
 def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    """Auto-detect the most relevant domain from query keywords"""
+    scores = domain_scores(query)
+    best = max(scores, key=scores.get) if scores else None
+    return best if best is not None and scores[best] > 0 else "style"
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
 
+def search(query, domain=None, max_results=MAX_RESULTS, hybrid=False, where=None, facets=False):
+    """
+    Main search function with auto-domain detection.
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+    hybrid fuses BM25 with offline LSA vectors (reciprocal-rank fusion) so
+    paraphrases match; it needs numpy and is plain BM25 without it.
+
+    where filters on the domain's facet_cols before scoring, e.g.
+    {"Severity": "High", "Platform": ["Web", "All"]} or ["Severity=High"];
+    facets=True adds per-value counts of the matching rows. Both use BM25
+    (hybrid is ignored).
+    """
+    try:
+        where = _normalize_where(where)
+    except ValueError as e:
+        return {"error": str(e), "domain": domain}
     if domain is None:
         domain = detect_domain(query)
 
@@ -225,19 +1950,121 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    found = None
+    if where or facets:
+        found = _search_faceted(filepath, config["search_cols"], config["output_cols"], query, max_results,
+                                config.get("search_weights"), config.get("facet_cols"), where, facets)
+        if "error" in found:
+            return {"error": found["error"], "domain": domain}
+        results = found["results"]
+    else:
+        results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, config.get("search_weights"), hybrid)
 
-    return {
+    result = {
         "domain": domain,
         "query": query,
         "file": config["file"],
         "count": len(results),
         "results": results
     }
+    if where:
+        result["where"] = where
+    if facets:
+        result["facets"] = found["facets"]
+    return result
+
+
+def search_domains(query, limits):
+    """
+    Search several domains in one scoring pass over a global index of just
+    those domains.
+
+    limits maps domain -> max_results; returns domain -> search() style dict.
+    """
+    global_index = _get_global_index(limits)
+    indexes = dict(zip(global_index.tags, global_index.indexes))
+
+    # Serve what we can from the result cache, score the rest in one pass
+    row_ids, keys = {}, {}
+    for domain, max_results in limits.items():
+        if domain in CSV_CONFIG and domain in indexes:
+            keys[domain] = ResultCache.key(indexes[domain], query, max_results)
+            row_ids[domain] = RESULT_CACHE.get(keys[domain], indexes[domain].generation)
+    missing = {domain: limits[domain] for domain, ids in row_ids.items() if ids is None}
+    if missing:
+        with profile_stage("search.score_global"):
+            ranked_domains = global_index.score(query, missing)
+        for domain, ranked in ranked_domains.items():
+            row_ids[domain] = [idx for idx, score in ranked if score > 0]
+            RESULT_CACHE.put(keys[domain], indexes[domain].generation, row_ids[domain])
+
+    results = {}
+    for domain in limits:
+        config = CSV_CONFIG.get(domain)
+        if config is None:
+            results[domain] = {"error": f"Unknown domain: {domain}", "domain": domain}
+            continue
+        if domain not in indexes:
+            results[domain] = {"error": f"File not found: {DATA_DIR / config['file']}", "domain": domain}
+            continue
+        rows = indexes[domain].rows
+        found = [rows.row(idx) for idx in row_ids[domain]]
+        results[domain] = {
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(found),
+            "results": found
+        }
+    return results
+
+
+def search_batch(queries, domain=None, max_results=MAX_RESULTS):
+    """Search many queries at once; returns one search() style dict per query"""
+    domains = [domain if domain is not None else detect_domain(query) for query in queries]
+    results = [None] * len(queries)
 
+    for batch_domain in dict.fromkeys(domains):
+        positions = [i for i, d in enumerate(domains) if d == batch_domain]
+        config = CSV_CONFIG.get(batch_domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
+        if not filepath.exists():
+            for i in positions:
+                results[i] = {"error": f"File not found: {filepath}", "domain": batch_domain}
+            continue
+
+        batch_queries = [queries[i] for i in positions]
+        hits = _search_csv_batch(filepath, config["search_cols"], config["output_cols"], batch_queries, max_results, config.get("search_weights"))
+        for i, rows in zip(positions, hits):
+            results[i] = {
+                "domain": batch_domain,
+                "query": queries[i],
+                "file": config["file"],
+                "count": len(rows),
+                "results": rows
+            }
+
+    return results
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, hybrid=False, where=None, facets=False):
+    """
+    Search stack-specific guidelines (hybrid, where and facets as in search()).
+
+    stack "all" or a comma-separated list runs search_stacks(), which is BM25
+    only: asking it for hybrid ranking, filters or facets is an error.
+    """
+    try:
+        where = _normalize_where(where)
+    except ValueError as e:
+        return {"error": str(e), "stack": stack}
+    if _is_multi_stack(stack):
+        if where or facets:
+            return {"error": "Facet filters and counts need a single stack", "stack": stack}
+        if hybrid:
+            return {"error": "Hybrid ranking needs a single stack", "stack": stack}
+        return search_stacks(query, stack, max_results)
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
@@ -246,9 +2073,17 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    found = None
+    if where or facets:
+        found = _search_faceted(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results,
+                                _STACK_COLS["search_weights"], _STACK_COLS["facet_cols"], where, facets)
+        if "error" in found:
+            return {"error": found["error"], "stack": stack}
+        results = found["results"]
+    else:
+        results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results, _STACK_COLS["search_weights"], hybrid)
 
-    return {
+    result = {
         "domain": "stack",
         "stack": stack,
         "query": query,
@@ -256,3 +2091,118 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+    if where:
+        result["where"] = where
+    if facets:
+        result["facets"] = found["facets"]
+    return result
+
+
+def search_stack_batch(queries, stack, max_results=MAX_RESULTS):
+    """Search many queries against one stack; returns one search_stack() style dict per query"""
+    if _is_multi_stack(stack):
+        return [search_stacks(query, stack, max_results) for query in queries]
+    if stack not in STACK_CONFIG:
+        return [{"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"} for _ in queries]
+
+    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+
+    if not filepath.exists():
+        return [{"error": f"Stack file not found: {filepath}", "stack": stack} for _ in queries]
+
+    hits = _search_csv_batch(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], queries, max_results, _STACK_COLS["search_weights"])
+
+    return [{
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": STACK_CONFIG[stack]["file"],
+        "count": len(rows),
+        "results": rows
+    } for query, rows in zip(queries, hits)]
+
+
+def _is_multi_stack(stack):
+    return not isinstance(stack, str) or stack == "all" or "," in stack
+
+
+def _stack_names(stacks):
+    """Stack names from "all", a comma-separated string or a list (deduplicated, in order)"""
+    if isinstance(stacks, str):
+        stacks = AVAILABLE_STACKS if stacks.strip() == "all" else stacks.split(",")
+    return list(dict.fromkeys(name.strip() for name in stacks if name.strip()))
+
+
+def _guideline_tokens(row):
+    return frozenset(DEFAULT_ANALYZER.analyze(f"{row.get('Guideline') or ''} {row.get('Description') or ''}"))
+
+
+def search_stacks(query, stacks="all", max_results=MAX_RESULTS, global_results=None):
+    """
+    Search several stacks in one scoring pass over the global index.
+
+    stacks is "all", a comma-separated string or a list. "by_stack" holds each
+    stack's top max_results, ranked as search_stack() ranks them. "results" is
+    the top global_results (default max_results) across the stacks by score,
+    each row tagged with its "Stack". A hit whose guideline is near-identical
+    (STACK_DEDUPE_SIMILARITY) to a better one is folded into that row's
+    "Also In", which only rows that absorbed such hits carry.
+    """
+    names = _stack_names(stacks)
+    unknown = [name for name in names if name not in STACK_CONFIG]
+    if unknown or not names:
+        return {"error": f"Unknown stack: {', '.join(unknown) or stacks}. Available: {', '.join(AVAILABLE_STACKS)}"}
+    global_results = max_results if global_results is None else global_results
+
+    global_index = _get_global_index()
+    indexes = dict(zip(global_index.tags, global_index.indexes))
+    present = [name for name in names if stack_tag(name) in indexes]
+
+    # Full ranking per stack: the merged list may have to skip duplicates
+    limits = {stack_tag(name): len(indexes[stack_tag(name)].bm25.doc_lengths) for name in present}
+    with profile_stage("search.score_global"):
+        ranked = global_index.score(query, limits)
+
+    by_stack, candidates = {}, []
+    for order, name in enumerate(names):
+        config = STACK_CONFIG[name]
+        if name not in present:
+            by_stack[name] = {"error": f"Stack file not found: {DATA_DIR / config['file']}", "stack": name}
+            continue
+        rows = indexes[stack_tag(name)].rows
+        hits = [(idx, score) for idx, score in ranked[stack_tag(name)] if score > 0]
+        found = [rows.row(idx) for idx, _ in hits[:max_results]]
+        by_stack[name] = {"file": config["file"], "count": len(found), "results": found}
+        candidates.extend((-score, order, idx) for idx, score in hits)
+
+    # Merge by score; ties keep stack order, then document order
+    candidates.sort()
+    results, tokens = [], []
+    for _, order, idx in candidates:
+        if len(results) >= global_results:
+            break
+        name = names[order]
+        row = indexes[stack_tag(name)].rows.row(idx)
+        row_tokens = _guideline_tokens(row)
+        for kept, kept_tokens in zip(results, tokens):
+            union = len(row_tokens | kept_tokens)
+            if union and len(row_tokens & kept_tokens) / union >= STACK_DEDUPE_SIMILARITY:
+                if name != kept["Stack"] and name not in kept.get("Also In", ()):
+                    kept.setdefault("Also In", []).append(name)
+                break
+        else:
+            results.append({"Stack": name, **row})
+            tokens.append(row_tokens)
+    for row in results:
+        if "Also In" in row:
+            row["Also In"] = ", ".join(row["Also In"])
+
+    return {
+        "domain": "stack",
+        "stack": stacks if isinstance(stacks, str) else ",".join(names),
+        "stacks": names,
+        "query": query,
+        "count": len(results),
+        "results": results,
+        "by_stack": by_stack
+    }
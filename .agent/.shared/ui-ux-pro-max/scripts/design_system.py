@@ -13,12 +13,19 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
+import copy
 import csv
 import json
 import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import (search_domains, preload_indexes, profile_count, profile_stage, profile_worker, read_artifact, write_artifact,
+                  DATA_DIR, INDEX_DIR, INDEX_VERSION)
 
 
 # ============ CONFIGURATION ============
@@ -32,64 +39,209 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Generated design systems keyed by (query, project name, hash of every CSV);
+# bump DESIGN_CACHE_VERSION when generation logic changes
+DESIGN_CACHE_VERSION = 1
+DESIGN_CACHE_SIZE = 256
+DESIGN_CACHE_FILE = INDEX_DIR / "design-system.cache"
 
-# ============ DESIGN SYSTEM GENERATOR ============
-class DesignSystemGenerator:
-    """Generates design system recommendations from aggregated searches."""
+# Read once at import: os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
-
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+# ============ REASONING INDEX ============
+class ReasoningIndex:
+    """
+    ui-reasoning.csv compiled for rule lookup, with the first-match semantics
+    of a linear scan (exact, then partial, then keyword match):
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
+    - exact:   UI_Category -> first rule
+    - partial: UI_Category inside the category is found by probing, at each
+               position of the category, the UI_Categories starting with the
+               next two characters; the category inside a UI_Category by one
+               find() over all UI_Categories joined in rule order
+    - keyword: keyword -> first rule, probed the same way as UI_Categories
 
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+    Decision rules and style priorities are parsed once.
+    """
 
-        # Try partial match
-        for rule in self.reasoning_data:
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.exact = {}
+        self.keywords = {}
+        ui_cats = []
+        for idx, rule in enumerate(rules):
             ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+            ui_cats.append(ui_cat)
+            self.exact.setdefault(ui_cat, idx)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self.keywords.setdefault(kw, idx)
+
+        # Start offset of each rule's UI_Category in the joined haystack
+        self.haystack = "\n".join(ui_cats)
+        self.starts, self.ends = [], []
+        offset = 0
+        for ui_cat in ui_cats:
+            self.starts.append(offset)
+            self.ends.append(offset + len(ui_cat))
+            offset += len(ui_cat) + 1
+        self.category_prefixes = self._prefix_buckets(self.exact)
+        self.keyword_prefixes = self._prefix_buckets(self.keywords)
+        self.reasoning = [self._compile(rule) for rule in rules]
+
+    @staticmethod
+    def _compile(rule: dict) -> dict:
+        decision_rules = {}
+        try:
+            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+        except json.JSONDecodeError:
+            pass
+        return {
+            "pattern": rule.get("Recommended_Pattern", ""),
+            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+            "color_mood": rule.get("Color_Mood", ""),
+            "typography_mood": rule.get("Typography_Mood", ""),
+            "key_effects": rule.get("Key_Effects", ""),
+            "anti_patterns": rule.get("Anti_Patterns", ""),
+            "decision_rules": decision_rules,
+            "severity": rule.get("Severity", "MEDIUM")
+        }
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+    @staticmethod
+    def _prefix_buckets(table: dict) -> dict:
+        """First two characters -> [(term, rule index), ...] by rule index"""
+        buckets = {}
+        for term, idx in table.items():
+            if term:
+                buckets.setdefault(term[:2], []).append((term, idx))
+        for bucket in buckets.values():
+            bucket.sort(key=lambda x: x[1])
+        return buckets
+
+    @staticmethod
+    def _first_substring(text: str, buckets: dict) -> int:
+        """Smallest rule index of a bucketed term occurring in text (-1 if none)"""
+        best = -1
+        for i in range(len(text)):
+            for prefix in (text[i:i + 2], text[i]):
+                for term, idx in buckets.get(prefix, ()):
+                    if best >= 0 and idx >= best:
+                        break
+                    if text.startswith(term, i):
+                        best = idx
+                        break
+        return best
+
+    def find(self, category: str) -> int:
+        """Index of the matching rule for a category, or -1"""
+        category_lower = category.lower()
+
+        idx = self.exact.get(category_lower)
+        if idx is not None:
+            return idx
+
+        # Partial: UI_Category in category, or category in UI_Category
+        inside = self._first_substring(category_lower, self.category_prefixes)
+        if "" in self.exact and (inside < 0 or self.exact[""] < inside):
+            inside = self.exact[""]
+        pos = self.haystack.find(category_lower)
+        while pos >= 0:
+            # A match spanning two categories does not count; try the next one
+            rule = bisect_right(self.starts, pos) - 1
+            if pos + len(category_lower) <= self.ends[rule]:
+                break
+            pos = self.haystack.find(category_lower, pos + 1)
+        containing = bisect_right(self.starts, pos) - 1 if pos >= 0 else -1
+        candidates = [i for i in (inside, containing) if i >= 0]
+        if candidates:
+            return min(candidates)
+
+        return self._first_substring(category_lower, self.keyword_prefixes)
+
+
+_REASONING_INDEX = None
+
+
+def _reasoning_index() -> ReasoningIndex:
+    """Process-wide ReasoningIndex, recompiled when ui-reasoning.csv changes."""
+    global _REASONING_INDEX
+    filepath = DATA_DIR / REASONING_FILE
+    try:
+        stat = os.stat(filepath)
+        stamp = (str(filepath), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = (str(filepath), None, None)
+    current = _REASONING_INDEX
+    if current is None or current[0] != stamp:
+        rules = []
+        if stamp[1] is not None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                rules = list(csv.DictReader(f))
+        current = _REASONING_INDEX = (stamp, ReasoningIndex(rules))
+    return current[1]
+
+
+# ============ DESIGN SYSTEM GENERATOR ============
+class DesignSystemGenerator:
+    """Generates design system recommendations from aggregated searches."""
 
-        return {}
+    def __init__(self):
+        self.reasoning_index = _reasoning_index()
+        self.reasoning_data = self.reasoning_index.rules
+        self.timings = {}
+        self._lookups = {}
+
+    def _timed(self, phase: str, func, *args):
+        """Run func(*args), adding its wall time in ms to self.timings[phase] (and the active profile)."""
+        start = time.perf_counter()
+        try:
+            with profile_stage(f"design.{phase}"):
+                return func(*args)
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0.0) + (time.perf_counter() - start) * 1000
+
+    def _warm_indexes(self, domains: list) -> None:
+        """Load the domain indexes (no-op for already-loaded ones)."""
+        preload_indexes(domains)
+
+    def _run_lookups(self, lookups: list) -> list:
+        """
+        Run distinct (domain, query, max_results) lookups, memoized per generator.
+
+        Lookups sharing a query are scored together in one global-index pass.
+        """
+        pending = [lookup for lookup in dict.fromkeys(lookups) if lookup not in self._lookups]
+        profile_count("design.lookups", len(pending))
+        profile_count("design.lookups_reused", len(lookups) - len(pending))
+        while pending:
+            query = pending[0][1]
+            batch = {}
+            for lookup in pending:
+                if lookup[1] == query:
+                    batch.setdefault(lookup[0], lookup)
+            found = search_domains(query, {domain: lookup[2] for domain, lookup in batch.items()})
+            self._lookups.update((lookup, found[domain]) for domain, lookup in batch.items())
+            pending = [lookup for lookup in pending if lookup not in self._lookups]
+        return [self._lookups[lookup] for lookup in lookups]
+
+    def _search_domains(self, query: str, domains: list) -> dict:
+        """Search the given SEARCH_CONFIG domains in one pass."""
+        lookups = [(domain, query, SEARCH_CONFIG[domain]["max_results"]) for domain in domains]
+        return dict(zip(domains, self._timed("domain_search", self._run_lookups, lookups)))
+
+    def _priority_style_search(self, query: str, style_priority: list) -> dict:
+        """Search styles with the reasoning rule's priority keywords added."""
+        priority_query = " ".join(style_priority[:2]) if style_priority else query
+        combined_query = f"{query} {priority_query}"
+        lookup = ("style", combined_query, SEARCH_CONFIG["style"]["max_results"])
+        return self._timed("style_search", self._run_lookups, [lookup])[0]
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        idx = self.reasoning_index.find(category)
 
-        if not rule:
+        if idx < 0:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -101,23 +253,11 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        # Pre-parsed; copied so callers cannot alter the shared table
+        reasoning = dict(self.reasoning_index.reasoning[idx])
+        reasoning["style_priority"] = list(reasoning["style_priority"])
+        reasoning["decision_rules"] = dict(reasoning["decision_rules"])
+        return reasoning
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -161,21 +301,32 @@ class DesignSystemGenerator:
         return search_result.get("results", [])
 
     def generate(self, query: str, project_name: str = None) -> dict:
-        """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
+        """
+        Generate complete design system recommendation.
+
+        Per-phase wall times (ms) of the last call are left in self.timings.
+        """
+        self.timings = {}
+        start = time.perf_counter()
+        self._timed("warm_indexes", self._warm_indexes, list(SEARCH_CONFIG))
+
+        # Step 1: Every domain but style, in one pass; the product hit gives
+        # the category. Style is searched once the reasoning rule is known.
+        search_results = self._search_domains(query, [domain for domain in SEARCH_CONFIG if domain != "style"])
+        product_results = self._extract_results(search_results.get("product", {}))
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        reasoning = self._timed("reasoning", self._apply_reasoning, category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Styles, re-ranked with style priority hints when the rule has them
+        if style_priority:
+            search_results["style"] = self._priority_style_search(query, style_priority)
+        else:
+            search_results.update(self._search_domains(query, ["style"]))
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -194,7 +345,7 @@ class DesignSystemGenerator:
         reasoning_effects = reasoning.get("key_effects", "")
         combined_effects = style_effects if style_effects else reasoning_effects
 
-        return {
+        design_system = {
             "project_name": project_name or query.upper(),
             "category": category,
             "pattern": {
@@ -234,6 +385,8 @@ class DesignSystemGenerator:
             "decision_rules": reasoning.get("decision_rules", {}),
             "severity": reasoning.get("severity", "MEDIUM")
         }
+        self.timings["total"] = (time.perf_counter() - start) * 1000
+        return design_system
 
 
 # ============ OUTPUT FORMATTERS ============
@@ -458,6 +611,101 @@ def format_markdown(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+# ============ GENERATION CACHE ============
+class DesignSystemCache:
+    """
+    LRU of generated design systems keyed by (query, project name, data hash),
+    persisted to DESIGN_CACHE_FILE so repeated CLI runs hit as well.
+
+    The data hash covers every CSV under DATA_DIR; a file is re-hashed only
+    when its mtime or size changed.
+    """
+
+    def __init__(self, path=DESIGN_CACHE_FILE, maxsize=DESIGN_CACHE_SIZE):
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.file_hashes = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        stored = read_artifact(self.path)
+        if stored is not None and stored.get("design_version") == DESIGN_CACHE_VERSION:
+            self.entries = stored["entries"]
+            self.file_hashes = stored["file_hashes"]
+
+    def data_hash(self) -> str:
+        """sha256 over the content hashes of every CSV input"""
+        import hashlib
+        digest = hashlib.sha256()
+        for filepath in sorted(DATA_DIR.rglob("*.csv")):
+            stat = os.stat(filepath)
+            known = self.file_hashes.get(str(filepath))
+            if known is None or known[:2] != (stat.st_mtime_ns, stat.st_size):
+                with open(filepath, 'rb') as f:
+                    known = (stat.st_mtime_ns, stat.st_size, hashlib.sha256(f.read()).hexdigest())
+                self.file_hashes[str(filepath)] = known
+                self._dirty = True
+            digest.update(f"{filepath.relative_to(DATA_DIR)}\0{known[2]}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def key(self, query: str, project_name: str = None) -> tuple:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return (query, project_name, self.data_hash())
+
+    def get(self, key: tuple):
+        """Stored design system (a private copy) or None"""
+        with self._lock:
+            design_system = self.entries.get(key)
+            if design_system is None:
+                return None
+            self.entries.move_to_end(key)
+            return copy.deepcopy(design_system)
+
+    def put(self, key: tuple, design_system: dict) -> None:
+        with self._lock:
+            self.entries[key] = copy.deepcopy(design_system)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            write_artifact(self.path, {"version": INDEX_VERSION, "design_version": DESIGN_CACHE_VERSION,
+                                      "entries": self.entries, "file_hashes": self.file_hashes})
+            self._dirty = False
+
+
+DESIGN_CACHE = DesignSystemCache()
+
+
+def generate_cached(query: str, project_name: str = None, generator: "DesignSystemGenerator" = None, save: bool = True) -> tuple:
+    """
+    DesignSystemGenerator().generate() memoized on query, project name and CSV content.
+
+    Returns (design_system, hit) where hit tells whether it came from the cache.
+    """
+    key = DESIGN_CACHE.key(query, project_name)
+    design_system = DESIGN_CACHE.get(key)
+    hit = design_system is not None
+    profile_count("design.cache_hits" if hit else "design.cache_misses")
+    if not hit:
+        design_system = (generator or DesignSystemGenerator()).generate(query, project_name)
+        DESIGN_CACHE.put(key, design_system)
+    if save:
+        DESIGN_CACHE.save()
+    return design_system, hit
+
+
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
                            persist: bool = False, page: str = None, output_dir: str = None) -> str:
@@ -475,20 +723,95 @@ def generate_design_system(query: str, project_name: str = None, output_format:
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    design_system, _ = generate_cached(query, project_name)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        with profile_stage("design.persist"):
+            persist_design_system(design_system, page, output_dir, query)
+
+    with profile_stage("design.format"):
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
+
+
+def _project_slug(project_name: str) -> str:
+    return project_name.lower().replace(' ', '-')
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+
+def generate_design_system_batch(spec, output_dir: str = None, max_workers: int = 8) -> dict:
+    """
+    Generate and persist design systems for many projects and pages in one run.
+
+    spec is {"output_dir": ..., "projects": [...]} or just the projects list.
+    Each project is {"query": ..., "project_name": ..., "pages": [...]} where
+    a page is a name or {"name": ..., "query": ...} (query defaults to the
+    project's). One generator serves every project, so indexes are loaded
+    once and identical domain lookups run once. Files are written
+    concurrently, one task per project folder in spec order.
+
+    Returns per-project timings (ms) and written/unchanged file counts.
+    """
+    start = time.perf_counter()
+    if isinstance(spec, list):
+        spec = {"projects": spec}
+    output_dir = output_dir or spec.get("output_dir")
+    generator = DesignSystemGenerator()
+
+    # Generation is sequential; each generate() scores its lookups in one pass per query
+    reports = []
+    for project in spec.get("projects", []):
+        project_start = time.perf_counter()
+        design_system, cached = generate_cached(project["query"], project.get("project_name"), generator, save=False)
+        pages = [page if isinstance(page, dict) else {"name": page} for page in project.get("pages", [])]
+        reports.append({
+            "project_name": design_system["project_name"],
+            "query": project["query"],
+            "category": design_system["category"],
+            "cached": cached,
+            "generate_ms": round((time.perf_counter() - project_start) * 1000, 3),
+            "_design_system": design_system,
+            "_pages": pages
+        })
+    DESIGN_CACHE.save()
+
+    def persist_project(report):
+        persist_start = time.perf_counter()
+        design_system, pages = report.pop("_design_system"), report.pop("_pages")
+        written, unchanged = [], []
+        for page in pages or [None]:
+            page_name = page and page["name"]
+            page_query = (page or {}).get("query", report["query"])
+            with profile_stage("design.persist"):
+                files = persist_design_system(design_system, page_name, output_dir, page_query, generator)
+            written += [f for f in files["created_files"] if f not in written]
+            unchanged += [f for f in files["unchanged_files"] if f not in unchanged]
+            report["dir"] = files["design_system_dir"]
+        report["files_written"] = len(written)
+        report["files_unchanged"] = len([f for f in unchanged if f not in written])
+        report["persist_ms"] = round((time.perf_counter() - persist_start) * 1000, 3)
+
+    # Projects sharing a folder are persisted in order by one task
+    groups = OrderedDict()
+    for report in reports:
+        groups.setdefault(_project_slug(report["project_name"]), []).append(report)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max(1, min(max_workers, len(groups)))) as pool:
+        persist_group = profile_worker(lambda group: [persist_project(r) for r in group])
+        for future in [pool.submit(persist_group, group) for group in groups.values()]:
+            future.result()
+
+    return {
+        "projects": reports,
+        "total_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          generator: "DesignSystemGenerator" = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
@@ -497,20 +820,25 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        generator: Optional DesignSystemGenerator whose lookups the page searches share
     
+    Files whose content (ignoring the Generated timestamp) is unchanged are
+    not rewritten, so their mtimes stay put; others are replaced atomically.
+
     Returns:
-        dict with created file paths and status
+        dict with written and unchanged file paths and status
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
     # Use project name for project-specific folder
     project_name = design_system.get("project_name", "default")
-    project_slug = project_name.lower().replace(' ', '-')
+    project_slug = _project_slug(project_name)
     
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    unchanged_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
@@ -520,25 +848,60 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     
     # Generate and write MASTER.md
     master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    (created_files if _write_if_changed(master_file, master_content) else unchanged_files).append(str(master_file))
     
     # If page is specified, create page override file with intelligent content
     if page:
         page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+        page_content = format_page_override_md(design_system, page, page_query, generator)
+        (created_files if _write_if_changed(page_file, page_content) else unchanged_files).append(str(page_file))
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "unchanged_files": unchanged_files
     }
 
 
+# The timestamp line differs on every run and does not count as a change
+_GENERATED_LINE = re.compile(r'^(?:> )?\*\*Generated:\*\* .*$', re.MULTILINE)
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Atomically write content unless the file already holds it; True if written."""
+    import hashlib
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = f.read()
+    except (OSError, UnicodeDecodeError):
+        existing = None
+    if existing is not None:
+        digests = [hashlib.sha256(_GENERATED_LINE.sub("", text).encode('utf-8')).digest() for text in (existing, content)]
+        if digests[0] == digests[1]:
+            return False
+
+    # The temp file is created 0600; keep the mode the file has, or would get from open()
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+
+    import tempfile
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, prefix=f".{path.name}.",
+                                         suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+            f.write(content)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    finally:
+        if tmp is not None and tmp.exists():
+            tmp.unlink()
+    return True
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -802,14 +1165,15 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            generator: "DesignSystemGenerator" = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system, generator)
     
     lines = []
     
@@ -911,23 +1275,26 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
-def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
+def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict,
+                                    generator: "DesignSystemGenerator" = None) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
     
     Uses the existing search infrastructure to find relevant style, UX, and layout
-    data instead of hardcoded page types.
+    data instead of hardcoded page types. Searches run in one pass through the
+    generator's lookups, so pages sharing a context search once.
     """
-    from core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    generator = generator or DesignSystemGenerator()
+    style_search, ux_search, landing_search = generator._run_lookups([
+        ("style", combined_context, 1),
+        ("ux", combined_context, 3),
+        ("landing", combined_context, 1)
+    ])
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Out-of-Core Index - BM25F over memory-mapped postings for very large CSVs
+Usage: python mmap_index.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python mmap_index.py "<query>" --domain ux --data-dir /path/to/pattern-library
+
+The builder streams the CSV one record at a time. Per-field term counts are
+buffered until SPILL_POSTINGS entries, then spilled to a sorted run file.
+The runs are merged with heapq.merge into flat binary arrays. Build time is
+linear in the input; peak heap is bounded by the spill size plus two
+integers per document.
+
+Index directory (<INDEX_DIR>/<csv>.mmap/):
+  meta.json          N, field weights, average field lengths, source CSV stamp
+  terms.bin          vocabulary, UTF-8, sorted, concatenated
+  term_offsets.bin   u64 x (terms + 1)  byte range of each term in terms.bin
+  post_offsets.bin   u64 x (terms + 1)  posting range of each term
+  post_docs.bin      u32 per posting    document id
+  post_tfs.bin       f32 per posting    BM25F pseudo term frequency
+  doc_offsets.bin    u64 x (N + 1)      byte range of each document's CSV record
+
+Queries binary-search the mapped vocabulary and read postings and result
+rows straight from the mapped files, so the corpus never enters the heap.
+Ranking matches core.BM25 (up to f32 rounding) for exact terms. Typo and
+prefix expansion needs the in-memory trigram index and is not done here.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from array import array
+from collections import defaultdict
+from itertools import groupby
+from math import log
+from operator import itemgetter
+from pathlib import Path
+from core import CSV_CONFIG, STACK_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, DEFAULT_ANALYZER, artifact_path, detect_domain, stack_config
+
+# ============ CONFIGURATION ============
+MMAP_VERSION = 1
+SPILL_POSTINGS = 500000  # (term, doc) entries buffered before a run is spilled
+
+
+# ============ CSV STREAMING ============
+def _iter_records(path):
+    """(start, end, fields) for every CSV record, with byte offsets into the file"""
+    import csv
+    with open(path, 'rb') as f:
+        offset = start = quotes = 0
+        pending = []
+        for line in f:
+            if not pending:
+                start = offset
+            pending.append(line)
+            quotes += line.count(b'"')
+            offset += len(line)
+            if quotes % 2:
+                continue  # newline inside a quoted field
+            record = b"".join(pending).decode('utf-8')
+            pending, quotes = [], 0
+            if record.strip():
+                yield start, offset, next(csv.reader(record.splitlines(True)))
+        if pending:
+            yield start, offset, next(csv.reader(b"".join(pending).decode('utf-8').splitlines(True)))
+
+
+def _parse_record(raw):
+    import csv
+    return next(csv.reader(raw.decode('utf-8').splitlines(True)), [])
+
+
+# ============ BUILDER ============
+def _spill(buffer, directory, number):
+    """Write buffered postings as a term-sorted run file"""
+    path = Path(directory) / f"run-{number:05d}.bin"
+    with open(path, 'wb') as f:
+        for term in sorted(buffer):
+            pickle.dump((term, buffer[term]), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def build(csv_path, out_dir, search_cols, output_cols, search_weights=None, k1=1.5, b=0.75,
+          analyzer=None, spill_postings=SPILL_POSTINGS):
+    """Stream csv_path into a memory-mapped BM25F index at out_dir (replaced atomically)"""
+    csv_path, out_dir = Path(csv_path), Path(out_dir)
+    analyzer = analyzer or DEFAULT_ANALYZER
+    search_weights = search_weights or {}
+    weights = [search_weights.get(col, 1.0) for col in search_cols]
+    n_fields = len(search_cols)
+    stat = os.stat(csv_path)
+
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(prefix=f"{out_dir.name}.", dir=out_dir.parent))
+    try:
+        # Pass 1: tokenize rows, spilling (term -> [(doc, per-field counts)]) runs
+        field_lengths = array('I')
+        doc_offsets = array('Q')
+        runs, buffer, buffered = [], defaultdict(list), 0
+        records = _iter_records(csv_path)
+        header = next(records, None)
+        fieldnames = header[2] if header else []
+        columns = [fieldnames.index(col) if col in fieldnames else None for col in search_cols]
+        end = header[1] if header else 0
+
+        n_docs = 0
+        for start, end, fields in records:
+            counts = {}
+            for f, column in enumerate(columns):
+                tokens = analyzer.analyze(fields[column]) if column is not None and column < len(fields) else []
+                field_lengths.append(len(tokens))
+                for token in tokens:
+                    per_field = counts.get(token)
+                    if per_field is None:
+                        per_field = counts[token] = [0] * n_fields
+                    per_field[f] += 1
+            for term, per_field in counts.items():
+                buffer[term].append((n_docs, per_field))
+            buffered += len(counts)
+            doc_offsets.append(start)
+            n_docs += 1
+            if buffered >= spill_postings:
+                runs.append(_spill(buffer, work, len(runs)))
+                buffer, buffered = defaultdict(list), 0
+        doc_offsets.append(end)
+        if buffer:
+            runs.append(_spill(buffer, work, len(runs)))
+        del buffer
+
+        # Length normalization needs corpus-wide averages, known only now
+        avg_field_lengths = [sum(field_lengths[f::n_fields]) / n_docs if n_docs else 0.0 for f in range(n_fields)]
+
+        # Pass 2: merge runs (runs are in document order, merge is stable) into flat arrays
+        term_offsets, post_offsets = array('Q', [0]), array('Q', [0])
+        n_terms = n_postings = term_bytes = 0
+        with open(work / "terms.bin", 'wb') as terms_file, \
+                open(work / "post_docs.bin", 'wb') as docs_file, \
+                open(work / "post_tfs.bin", 'wb') as tfs_file:
+            merged = heapq.merge(*[_read_run(path) for path in runs], key=itemgetter(0))
+            for term, group in groupby(merged, key=itemgetter(0)):
+                docs, tfs = array('I'), array('f')
+                for _, plist in group:
+                    for doc, per_field in plist:
+                        base = doc * n_fields
+                        tf = 0.0
+                        for f, count in enumerate(per_field):
+                            if count and weights[f]:
+                                norm = 1 - b + b * field_lengths[base + f] / avg_field_lengths[f]
+                                tf += weights[f] * count / norm
+                        if tf:
+                            docs.append(doc)
+                            tfs.append(tf)
+                if not docs:
+                    continue  # only seen in zero-weight fields
+                encoded = term.encode('utf-8')
+                terms_file.write(encoded)
+                docs.tofile(docs_file)
+                tfs.tofile(tfs_file)
+                term_bytes += len(encoded)
+                n_postings += len(docs)
+                n_terms += 1
+                term_offsets.append(term_bytes)
+                post_offsets.append(n_postings)
+
+        for name, values in (("term_offsets.bin", term_offsets), ("post_offsets.bin", post_offsets),
+                             ("doc_offsets.bin", doc_offsets)):
+            with open(work / name, 'wb') as f:
+                values.tofile(f)
+        for path in runs:
+            path.unlink()
+
+        meta = {
+            "version": MMAP_VERSION,
+            "byteorder": sys.byteorder,
+            "config": _config(search_cols, output_cols, search_weights),
+            "source": {"path": str(csv_path.resolve()), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size},
+            "k1": k1,
+            "b": b,
+            "N": n_docs,
+            "terms": n_terms,
+            "postings": n_postings,
+            "fieldnames": fieldnames,
+            "field_weights": weights,
+            "avg_field_lengths": avg_field_lengths
+        }
+        with open(work / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+        os.replace(work, out_dir)
+    except BaseException:
+        shutil.rmtree(work, ignore_errors=True)
+        raise
+    return out_dir
+
+
+def _config(search_cols, output_cols, search_weights):
+    """JSON-comparable build configuration"""
+    return [list(search_cols), list(output_cols), sorted([col, w] for col, w in search_weights.items()),
+            DEFAULT_ANALYZER.signature()]
+
+
+# ============ MAPPED INDEX ============
+def _map(path, typecode):
+    """
+    (mmap, view) of a file. Arrays are viewed as a memoryview cast to typecode;
+    byte files (typecode None) use the mmap itself, whose slices are bytes.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, memoryview(array(typecode)) if typecode else b""
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped).cast(typecode) if typecode else mapped
+
+
+class MmapIndex:
+    """Read-only BM25F index over memory-mapped files written by build()"""
+
+    def __init__(self, directory, csv_path):
+        directory = Path(directory)
+        with open(directory / "meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != MMAP_VERSION or self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Incompatible index: {directory}")
+        self.N = self.meta["N"]
+        self.k1 = self.meta["k1"]
+        self.n_terms = self.meta["terms"]
+        self.columns = self.meta["fieldnames"]
+
+        self._maps = []
+        self._terms = self._open(directory / "terms.bin", None)
+        self._term_offsets = self._open(directory / "term_offsets.bin", 'Q')
+        self._post_offsets = self._open(directory / "post_offsets.bin", 'Q')
+        self._post_docs = self._open(directory / "post_docs.bin", 'I')
+        self._post_tfs = self._open(directory / "post_tfs.bin", 'f')
+        self._doc_offsets = self._open(directory / "doc_offsets.bin", 'Q')
+        self._csv = self._open(csv_path, None)
+
+    def _open(self, path, typecode):
+        mapped, view = _map(path, typecode)
+        self._maps.append((mapped, view))
+        return view
+
+    def close(self):
+        """Release views and unmap files"""
+        for mapped, view in self._maps:
+            if isinstance(view, memoryview):
+                view.release()
+            if mapped is not None:
+                mapped.close()
+        self._maps = []
+
+    def find(self, term):
+        """Vocabulary position of term (binary search over the mapped lexicon), or -1"""
+        key = term.encode('utf-8')
+        terms, offsets = self._terms, self._term_offsets
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if terms[offsets[mid]:offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and terms[offsets[lo]:offsets[lo + 1]] == key:
+            return lo
+        return -1
+
+    def postings(self, term):
+        """(doc ids, pseudo tfs) views for a term; empty if not indexed"""
+        pos = self.find(term)
+        if pos < 0:
+            return (), ()
+        start, end = self._post_offsets[pos], self._post_offsets[pos + 1]
+        return self._post_docs[start:end], self._post_tfs[start:end]
+
+    def score(self, query, top_k=None):
+        """Score documents containing query terms, best first (top_k via heap)"""
+        scores = {}
+        k1 = self.k1
+        k1_plus_1 = k1 + 1
+        N = self.N
+
+        for term in DEFAULT_ANALYZER.analyze_query(query):
+            docs, tfs = self.postings(term)
+            df = len(docs)
+            if not df:
+                continue
+            idf = log((N - df + 0.5) / (df + 0.5) + 1)
+            for idx, tf in zip(docs, tfs):
+                scores[idx] = scores.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + k1)
+
+        # Ties keep document order
+        if top_k is None:
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        return heapq.nlargest(top_k, scores.items(), key=lambda x: (x[1], -x[0]))
+
+    def row(self, idx, output_cols):
+        """Parse one document's CSV record from the mapped file into {column: value}"""
+        fields = _parse_record(self._csv[self._doc_offsets[idx]:self._doc_offsets[idx + 1]])
+        record = dict(zip(self.columns, fields))
+        # Short records read as None, like csv.DictReader
+        return {col: record.get(col) for col in output_cols if col in self.columns}
+
+
+_OPEN_INDEXES = {}
+
+
+def _index_dir(filepath):
+    return artifact_path(filepath, ".mmap")
+
+
+def open_index(filepath, search_cols, output_cols, search_weights=None):
+    """Process-wide MmapIndex for a CSV, (re)built when the CSV or the config changed"""
+    search_weights = search_weights or {}
+    filepath = Path(filepath)
+    directory = _index_dir(filepath)
+    stat = os.stat(filepath)
+    config = _config(search_cols, output_cols, search_weights)
+
+    index = _OPEN_INDEXES.get(directory)
+    if index is not None:
+        source = index.meta["source"]
+        if (source["mtime_ns"], source["size"]) == (stat.st_mtime_ns, stat.st_size) and index.meta["config"] == config:
+            return index
+        index.close()
+        del _OPEN_INDEXES[directory]
+
+    try:
+        index = MmapIndex(directory, filepath)
+        source = index.meta["source"]
+        if (source["mtime_ns"], source["size"]) != (stat.st_mtime_ns, stat.st_size) or index.meta["config"] != config:
+            index.close()
+            index = None
+    except (OSError, ValueError, KeyError):
+        index = None
+
+    if index is None:
+        build(filepath, directory, search_cols, output_cols, search_weights)
+        index = MmapIndex(directory, filepath)
+    _OPEN_INDEXES[directory] = index
+    return index
+
+
+# ============ SEARCH FUNCTIONS ============
+def _search_csv(filepath, search_cols, output_cols, query, max_results, search_weights=None):
+    if not filepath.exists():
+        return []
+    index = open_index(filepath, search_cols, output_cols, search_weights)
+    return [index.row(idx, output_cols) for idx, score in index.score(query, top_k=max_results) if score > 0]
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, data_dir=None):
+    """core.search() over the out-of-core index; data_dir defaults to the shipped data"""
+    from core import DATA_DIR
+    if domain is None:
+        domain = detect_domain(query)
+
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = Path(data_dir or DATA_DIR) / config["file"]
+
+    if not filepath.exists():
+        return {"error": f"File not found: {filepath}", "domain": domain}
+
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, config.get("search_weights"))
+
+    return {
+        "domain": domain,
+        "query": query,
+        "file": config["file"],
+        "count": len(results),
+        "results": results
+    }
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, data_dir=None):
+    """core.search_stack() over the out-of-core index"""
+    from core import DATA_DIR
+    if stack not in STACK_CONFIG:
+        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    config = stack_config(stack)
+    filepath = Path(data_dir or DATA_DIR) / config["file"]
+
+    if not filepath.exists():
+        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, config["search_weights"])
+
+    return {
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": config["file"],
+        "count": len(results),
+        "results": results
+    }
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+    from search import format_output
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Out-of-Core Search")
+    parser.add_argument("query", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search")
+    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--data-dir", type=str, default=None, help="Directory with the CSVs (default: shipped data)")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    args = parser.parse_args()
+
+    if args.stack:
+        result = search_stack(args.query, args.stack, args.max_results, args.data_dir)
+    else:
+        result = search(args.query, args.domain, args.max_results, args.data_dir)
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(format_output(result))
@@ -3,20 +3,54 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py --batch queries.jsonl   (or --batch - to read stdin)
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py --design-system --batch spec.json [-o out/]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
+Stacks: html-tailwind, react, nextjs, ... (--stack all or --stack react,nextjs,shadcn
+        searches several in one pass: top results per stack plus a merged,
+        de-duplicated top list)
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Server mode (see server.py):
+  --server     Send the query (or each --batch chunk) to a running `server.py --socket PATH`
+               instead of searching in-process
+
+Hybrid retrieval:
+  --hybrid     Fuse BM25 with offline LSA vectors (needs numpy) so paraphrases match
+
+Facets (ux, react, web, icons and stacks; see facet_cols in core.py):
+  --where      Column=Value filter, case-insensitive, applied before scoring; repeat it
+               (values of one column OR together, columns AND): --where Severity=High --where Platform=Web
+  --facets     Also report per-value counts of the matching rows for drill-down
+
+Result cache:
+  --stats          Print result-cache hit/miss/eviction counters (JSON, on stderr) after the run
+  --persist-cache  Reuse and update the on-disk result cache across runs
+
+Profiling:
+  --profile    Report per-stage timings (index.*, search.*, design.*) and counters (docs scored,
+               postings touched, cache hits): under "profile" in --json and design-system batch
+               output, otherwise as JSON on stderr. With --server only the round trip is timed
+               here; the server's own histograms come from `server.py --profile` (profile_stats)
+
+Batch mode:
+  --batch      Read one JSON object per line ({"query": ..., "domain"/"stack": ..., "max_results": ...})
+               and write one JSON result per line, in input order
+  --design-system --batch spec.json
+               Persist design systems for many projects and pages
+               ({"projects": [{"query": ..., "project_name": ..., "pages": ["dashboard", ...]}]})
+               and print per-project timings as JSON
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+import sys
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, RESULT_CACHE, profiled, search, search_stack, search_batch, search_stack_batch
 
 
 def format_output(result):
@@ -25,13 +59,18 @@ def format_output(result):
         return f"Error: {result['error']}"
 
     output = []
-    if result.get("stack"):
+    if result.get("stacks"):
+        output.append(f"## UI Pro Max Stack Guidelines")
+        output.append(f"**Stacks:** {', '.join(result['stacks'])} | **Query:** {result['query']}")
+        output.append(f"**Found:** {result['count']} results across stacks\n")
+    elif result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
         output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
-    output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
+    if not result.get("stacks"):
+        output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
     for i, row in enumerate(result['results'], 1):
         output.append(f"### Result {i}")
@@ -42,16 +81,109 @@ def format_output(result):
             output.append(f"- **{key}:** {value_str}")
         output.append("")
 
+    if result.get("facets"):
+        output.append("### Facets")
+        for column, counts in result["facets"].items():
+            output.append(f"- **{column}:** " + (", ".join(f"{value} ({n})" for value, n in counts.items()) or "none"))
+        output.append("")
+
+    # Per-stack tops, by guideline only (full rows above)
+    if result.get("by_stack"):
+        output.append("### Top per stack")
+        for stack, found in result["by_stack"].items():
+            if "error" in found:
+                output.append(f"- **{stack}:** Error: {found['error']}")
+            else:
+                output.append(f"- **{stack}:** " + ("; ".join(row.get("Guideline", "") for row in found["results"]) or "no results"))
+        output.append("")
+
     return "\n".join(output)
 
 
+# ============ BATCH MODE ============
+BATCH_CHUNK = 512  # Lines held in memory at once
+
+
+def _parse_batch_line(line, default_domain, default_stack, default_max):
+    """Turn one JSONL line into a (kind, name, max_results, query) job or an error dict"""
+    import json
+    try:
+        spec = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    if not isinstance(spec, dict) or not isinstance(spec.get("query"), str):
+        return {"error": "Each line needs a string \"query\" field"}
+
+    max_results = spec.get("max_results", default_max)
+    # bool is an int subclass: true would silently mean 1
+    if isinstance(max_results, bool) or not isinstance(max_results, int) or max_results < 1:
+        return {"error": f"Invalid max_results: {max_results!r} (must be a positive integer)", "query": spec["query"]}
+
+    stack = spec.get("stack", None if "domain" in spec else default_stack)
+    if stack is not None:
+        return ("stack", stack, max_results, spec["query"])
+
+    domain = spec.get("domain", default_domain)
+    if domain is not None and domain not in CSV_CONFIG:
+        return {"error": f"Unknown domain: {domain}. Available: {', '.join(CSV_CONFIG)}", "query": spec["query"]}
+    return ("domain", domain, max_results, spec["query"])
+
+
+def _run_batch_chunk(jobs):
+    """Resolve a chunk of parsed jobs, grouping identical targets into one batch call"""
+    results = list(jobs)
+    groups = {}
+    for i, job in enumerate(jobs):
+        if isinstance(job, tuple):
+            groups.setdefault(job[:3], []).append(i)
+
+    for (kind, name, max_results), positions in groups.items():
+        queries = [jobs[i][3] for i in positions]
+        if kind == "stack":
+            found = search_stack_batch(queries, name, max_results)
+        else:
+            found = search_batch(queries, name, max_results)
+        for i, result in zip(positions, found):
+            results[i] = result
+    return results
+
+
+def run_batch(lines, out, default_domain=None, default_stack=None, default_max=MAX_RESULTS):
+    """Stream JSONL queries from lines to out as JSONL results, in input order"""
+    import json
+    chunk = []
+
+    def flush():
+        for result in _run_batch_chunk(chunk):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        chunk.clear()
+
+    for line in lines:
+        if not line.strip():
+            continue
+        chunk.append(_parse_batch_line(line, default_domain, default_stack, default_max))
+        if len(chunk) >= BATCH_CHUNK:
+            flush()
+    if chunk:
+        flush()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stack", "-s", type=str, default=None, help=f"Stack-specific search ({', '.join(AVAILABLE_STACKS)}), 'all' or a comma-separated list")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--hybrid", action="store_true", help="Fuse BM25 with offline dense vectors (needs numpy)")
+    parser.add_argument("--where", "-w", action="append", default=None, metavar="COLUMN=VALUE", help="Facet filter (repeatable)")
+    parser.add_argument("--facets", action="store_true", help="Report facet value counts of the matching rows")
+    parser.add_argument("--batch", type=str, default=None, metavar="FILE", help="Run queries from a JSONL file ('-' for stdin), writing JSONL results")
+    parser.add_argument("--stats", action="store_true", help="Print result cache statistics to stderr")
+    parser.add_argument("--persist-cache", action="store_true", help="Load and save the result cache on disk")
+    parser.add_argument("--server", type=str, default=None, metavar="SOCKET", help="Use a running server.py on this Unix socket")
+    parser.add_argument("--profile", action="store_true", help="Report per-stage timings and counters")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -62,45 +194,124 @@ if __name__ == "__main__":
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
 
     args = parser.parse_args()
+    if args.query is None and not args.batch:
+        parser.error("the query argument is required (or use --batch)")
+    if args.stack and args.stack != "all":
+        unknown = [name for name in args.stack.split(",") if name.strip() and name.strip() not in AVAILABLE_STACKS]
+        if unknown or not args.stack.strip(","):
+            parser.error(f"unknown stack: {', '.join(unknown) or args.stack} (choose from {', '.join(AVAILABLE_STACKS)}, all)")
 
-    # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
-        )
-        print(result)
-        
-        # Print persistence confirmation
-        if args.persist:
-            project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
-            print("\n" + "=" * 60)
-            print(f"✅ Design system persisted to design-system/{project_slug}/")
-            print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
-                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
-            print("")
-            print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
-            print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
-            print("=" * 60)
-    # Stack search
-    elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
-    # Domain search
+    if args.persist_cache:
+        RESULT_CACHE.load()
+
+    # Route through a warm server instead of loading indexes here
+    if args.server:
+        import os
+        from server import call
+
+        def search(query, domain, max_results, hybrid=False, where=None, facets=False):
+            return call(args.server, "search", query=query, domain=domain, max_results=max_results, hybrid=hybrid,
+                        where=where, facets=facets)
+
+        def search_stack(query, stack, max_results, hybrid=False, where=None, facets=False):
+            return call(args.server, "search_stack", query=query, stack=stack, max_results=max_results, hybrid=hybrid,
+                        where=where, facets=facets)
+
+        def search_batch(queries, domain, max_results):
+            return call(args.server, "search_batch", queries=queries, domain=domain, max_results=max_results)
+
+        def search_stack_batch(queries, stack, max_results):
+            return call(args.server, "search_stack_batch", queries=queries, stack=stack, max_results=max_results)
+
+        def generate_design_system(query, project_name, output_format, persist=False, page=None, output_dir=None):
+            return call(args.server, "generate_design_system", query=query, project_name=project_name,
+                        output_format=output_format, persist=persist, page=page, output_dir=output_dir or os.getcwd())
+
+    # Design-system batch persists many projects in-process
+    if args.batch and args.design_system:
+        if args.server:
+            parser.error("--design-system --batch runs in-process; drop --server")
+        label = "design_system_batch"
+    elif args.batch:
+        label = "batch"
+    elif args.design_system:
+        label = "generate_design_system"
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
+        label = "search_stack" if args.stack else "search"
+
+    json_result = None
+    with profiled(label, enabled=args.profile) as profile:
+        if args.batch and args.design_system:
             import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            from design_system import generate_design_system_batch
+            if args.batch == "-":
+                spec = json.load(sys.stdin)
+            else:
+                with open(args.batch, 'r', encoding='utf-8') as f:
+                    spec = json.load(f)
+            json_result = generate_design_system_batch(spec, args.output_dir)
+        # Batch mode streams JSONL in and out
+        elif args.batch:
+            if args.batch == "-":
+                run_batch(sys.stdin, sys.stdout, args.domain, args.stack, args.max_results)
+            else:
+                with open(args.batch, 'r', encoding='utf-8') as f:
+                    run_batch(f, sys.stdout, args.domain, args.stack, args.max_results)
+        # Design system takes priority
+        elif args.design_system:
+            if not args.server:
+                from design_system import generate_design_system
+            result = generate_design_system(
+                args.query, 
+                args.project_name, 
+                args.format,
+                persist=args.persist,
+                page=args.page,
+                output_dir=args.output_dir
+            )
+            print(result)
+            
+            # Print persistence confirmation
+            if args.persist:
+                project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
+                print("\n" + "=" * 60)
+                print(f"✅ Design system persisted to design-system/{project_slug}/")
+                print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
+                if args.page:
+                    page_filename = args.page.lower().replace(' ', '-')
+                    print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+                print("")
+                print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
+                print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
+                print("=" * 60)
+        # Stack search
+        elif args.stack:
+            result = search_stack(args.query, args.stack, args.max_results, args.hybrid, args.where, args.facets)
+            if args.json:
+                json_result = result
+            else:
+                print(format_output(result))
+        # Domain search
         else:
-            print(format_output(result))
+            result = search(args.query, args.domain, args.max_results, args.hybrid, args.where, args.facets)
+            if args.json:
+                json_result = result
+            else:
+                print(format_output(result))
+
+    # Profiles ride along with JSON output, otherwise go to stderr
+    if json_result is not None:
+        import json
+        if profile is not None:
+            json_result = {**json_result, "profile": profile.report()}
+        print(json.dumps(json_result, indent=2, ensure_ascii=False))
+    elif profile is not None:
+        import json
+        print(json.dumps({"profile": profile.report()}, ensure_ascii=False), file=sys.stderr)
+
+    if args.persist_cache:
+        RESULT_CACHE.save()
+    if args.stats:
+        import json
+        stats = call(args.server, "cache_stats") if args.server else RESULT_CACHE.stats()
+        print(json.dumps({"cache_stats": stats}), file=sys.stderr)
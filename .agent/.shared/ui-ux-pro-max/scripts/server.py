@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Server - Warm, resident search process speaking line-delimited JSON-RPC 2.0
+Usage: python server.py                      (JSON-RPC on stdin/stdout)
+       python server.py --socket /tmp/uipro.sock
+
+Every CSV_CONFIG domain and STACK_CONFIG stack index is loaded at startup.
+Indexes are re-validated against their CSV on each request, so edits to the
+data are picked up without restarting.
+
+Methods: search, search_stack, search_batch, search_stack_batch, generate_design_system,
+         cache_stats, profile_stats, ping
+
+With --profile every request is profiled and aggregated per method into
+stage-timing histograms, returned by profile_stats.
+
+Client:
+    from server import call
+    call("/tmp/uipro.sock", "search", query="glassmorphism", domain="style")
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+from core import (ProfileHistogram, add_profile_hook, cache_stats, preload_indexes, profiled, search, search_stack,
+                  search_batch, search_stack_batch)
+
+
+# ============ JSON-RPC DISPATCH ============
+def _generate_design_system(**params):
+    """Lazily import the generator so plain searches do not pay for it"""
+    from design_system import generate_design_system
+    return generate_design_system(**params)
+
+
+PROFILE_HISTOGRAM = None
+
+
+def enable_profiling():
+    """Profile every request and aggregate per-method histograms"""
+    global PROFILE_HISTOGRAM
+    if PROFILE_HISTOGRAM is None:
+        PROFILE_HISTOGRAM = ProfileHistogram()
+        add_profile_hook(PROFILE_HISTOGRAM)
+    return PROFILE_HISTOGRAM
+
+
+def profile_stats():
+    """Per-method stage histograms (empty unless started with --profile)"""
+    return PROFILE_HISTOGRAM.snapshot() if PROFILE_HISTOGRAM is not None else {}
+
+
+METHODS = {
+    "search": search,
+    "search_stack": search_stack,
+    "search_batch": search_batch,
+    "search_stack_batch": search_stack_batch,
+    "generate_design_system": _generate_design_system,
+    "cache_stats": cache_stats,
+    "profile_stats": profile_stats,
+    "ping": lambda: "pong"
+}
+
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def handle_request(line):
+    """Handle one JSON-RPC request line; returns the response dict or None for notifications"""
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return _error(None, -32700, f"Parse error: {e}")
+
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return _error(None, -32600, "Invalid request")
+
+    request_id = request.get("id")
+    method = METHODS.get(request["method"])
+    if method is None:
+        return _error(request_id, -32601, f"Method not found: {request['method']}")
+
+    params = request.get("params", {})
+    if not isinstance(params, (list, dict)):
+        return _error(request_id, -32602, "Invalid params")
+    try:
+        profile_request = PROFILE_HISTOGRAM is not None and request["method"] != "profile_stats"
+        with profiled(request["method"], enabled=profile_request):
+            result = method(*params) if isinstance(params, list) else method(**params)
+    except TypeError as e:
+        return _error(request_id, -32602, f"Invalid params: {e}")
+    except Exception as e:
+        return _error(request_id, -32603, f"Internal error: {e}")
+
+    if "id" not in request:
+        return None
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+# ============ TRANSPORTS ============
+def serve_stdio(stdin=sys.stdin, stdout=sys.stdout):
+    """Serve line-delimited JSON-RPC over stdin/stdout until EOF"""
+    for line in stdin:
+        if not line.strip():
+            continue
+        response = handle_request(line)
+        if response is not None:
+            stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            stdout.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One client connection; any number of request lines"""
+
+    def handle(self):
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            response = handle_request(raw.decode('utf-8'))
+            if response is not None:
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_unix(path):
+    """Serve line-delimited JSON-RPC on a Unix domain socket until SIGTERM (or Ctrl-C)"""
+    import signal
+    import threading
+    if os.path.exists(path):
+        os.unlink(path)
+    with _UnixServer(path, _RequestHandler) as server:
+        # serve_forever() blocks this thread, so the handler shuts down from another
+        previous = None
+        if threading.current_thread() is threading.main_thread():
+            previous = signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+        try:
+            server.serve_forever()
+        finally:
+            if previous is not None:
+                signal.signal(signal.SIGTERM, previous)
+            os.unlink(path)
+
+
+# ============ CLIENT ============
+def call(path, method, **params):
+    """Send one request to a running server socket and return its result"""
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        sock.shutdown(socket.SHUT_WR)
+        data = b"".join(iter(lambda: sock.recv(65536), b""))
+
+    response = json.loads(data)
+    if "error" in response:
+        raise RuntimeError(response["error"]["message"])
+    return response["result"]
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Search Server")
+    parser.add_argument("--socket", type=str, default=None, help="Unix socket path (default: JSON-RPC on stdin/stdout)")
+    parser.add_argument("--profile", action="store_true", help="Aggregate per-request stage timings (see profile_stats)")
+
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling()
+
+    preload_indexes()
+    if args.socket:
+        serve_unix(args.socket)
+    else:
+        serve_stdio()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max SQLite Backend - every domain and stack CSV in one SQLite file, searched with FTS5
+Usage: python sqlite_index.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python sqlite_index.py "glass*" --domain style          (prefix query)
+       python sqlite_index.py --build [--db ui-ux-pro-max.sqlite] (compile every CSV, e.g. to ship the file)
+
+Each CSV_CONFIG domain and STACK_CONFIG stack becomes an FTS5 table in one
+database (default <INDEX_DIR>/search.sqlite): the search columns are indexed,
+output-only columns are stored UNINDEXED. Results are ranked by FTS5's bm25()
+with the search_weights as column weights, so a query is one indexed SQL
+statement and no CSV is parsed once the database is built.
+
+The database runs in WAL mode, so any number of processes can read while one
+rebuilds a table. A table is rebuilt when its CSV's content hash changes (the
+mtime/size stamp is checked first, as for the pickled indexes); when the CSV
+is missing, the stored table is used as is, so the database can ship alone.
+
+Query words match whole terms; "word*" matches terms starting with word (or
+every word with --prefix). Ranking uses FTS5's bm25 (k1=1.2, b=0.75), not
+core.BM25's BM25F, and there is no typo expansion.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from core import CSV_CONFIG, STACK_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, DEFAULT_ANALYZER, detect_domain, parse_csv, stack_config
+
+# ============ CONFIGURATION ============
+SQLITE_VERSION = 1  # PRAGMA user_version of the schema below
+DB_FILE = "search.sqlite"
+PREFIX_INDEX = "2 3 4"  # Prefix lengths FTS5 indexes for "word*" queries
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,      -- CSV path relative to the data directory
+    tbl TEXT NOT NULL,          -- FTS5 table holding its rows
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    config TEXT NOT NULL,       -- search columns, weights and output columns (JSON)
+    columns TEXT NOT NULL       -- output columns present in the CSV header (JSON)
+)
+"""
+
+
+# ============ DATABASE ============
+_LOCAL = threading.local()
+_FTS5 = None
+
+
+def fts5_available():
+    """Whether this Python's SQLite was compiled with FTS5"""
+    global _FTS5
+    if _FTS5 is None:
+        try:
+            sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE temp.probe USING fts5(x)")
+            _FTS5 = True
+        except sqlite3.OperationalError:
+            _FTS5 = False
+    return _FTS5
+
+
+def default_db_path():
+    from core import INDEX_DIR
+    return INDEX_DIR / DB_FILE
+
+
+def connect(db_path=None):
+    """This thread's connection to db_path (created, WAL mode, on first use)"""
+    db_path = str(db_path or default_db_path())
+    connections = _LOCAL.__dict__.setdefault("connections", {})
+    conn = connections.get(db_path)
+    if conn is None:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; writers take BEGIN IMMEDIATE explicitly
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SQLITE_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            for (tbl,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'fts_%' AND sql LIKE '%fts5%'").fetchall():
+                conn.execute(f'DROP TABLE "{tbl}"')
+            conn.execute("DROP TABLE IF EXISTS sources")
+            conn.execute(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SQLITE_VERSION}")
+            conn.execute("COMMIT")
+        connections[db_path] = conn
+    return conn
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _source_config(search_cols, output_cols, search_weights):
+    return json.dumps([list(search_cols), sorted((search_weights or {}).items()), list(output_cols)])
+
+
+def _build_table(conn, name, filepath, search_cols, output_cols, search_weights, stamp, sha256, raw):
+    """(Re)create name's FTS5 table from raw CSV bytes; caller holds the write transaction"""
+    fieldnames, records, documents = parse_csv(raw, search_cols)
+    stored = [col for col in output_cols if col not in search_cols]
+    columns = [col for col in output_cols if col in fieldnames]
+
+    row = conn.execute("SELECT tbl FROM sources WHERE name = ?", (name,)).fetchone()
+    tbl = row[0] if row else "fts_" + re.sub(r'\W', '_', name)
+    conn.execute(f"DROP TABLE IF EXISTS {_quote(tbl)}")
+    definition = ", ".join([_quote(col) for col in search_cols] + [_quote(col) + " UNINDEXED" for col in stored])
+    conn.execute(f"CREATE VIRTUAL TABLE {_quote(tbl)} USING fts5({definition}, "
+                 f"tokenize = '{TOKENIZER}', prefix = '{PREFIX_INDEX}')")
+    placeholders = ", ".join("?" * (len(search_cols) + len(stored)))
+    conn.executemany(f"INSERT INTO {_quote(tbl)} VALUES ({placeholders})",
+                     (document + [record.get(col) for col in stored] for document, record in zip(documents, records)))
+    conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                 (name, tbl, str(filepath), stamp[0], stamp[1], sha256,
+                  _source_config(search_cols, output_cols, search_weights), json.dumps(columns)))
+
+
+def _table(conn, name, filepath, search_cols, output_cols, search_weights):
+    """
+    (table, output columns) for a CSV, rebuilding the table when the CSV changed.
+
+    Returns None when neither the CSV nor a stored table exists.
+    """
+    config = _source_config(search_cols, output_cols, search_weights)
+    row = conn.execute("SELECT tbl, mtime_ns, size, sha256, config, columns FROM sources WHERE name = ?", (name,)).fetchone()
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        # Shipped database without its CSVs
+        return (row[0], json.loads(row[5])) if row is not None and row[4] == config else None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if row is not None and row[4] == config and (row[1], row[2]) == stamp:
+        return row[0], json.loads(row[5])
+
+    import hashlib
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    sha256 = hashlib.sha256(raw).hexdigest()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have rebuilt it while we waited for the lock
+        row = conn.execute("SELECT tbl, sha256, config FROM sources WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[1] == sha256 and row[2] == config:
+            conn.execute("UPDATE sources SET mtime_ns = ?, size = ? WHERE name = ?", (stamp[0], stamp[1], name))
+        else:
+            _build_table(conn, name, filepath, search_cols, output_cols, search_weights, stamp, sha256, raw)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    row = conn.execute("SELECT tbl, columns FROM sources WHERE name = ?", (name,)).fetchone()
+    return row[0], json.loads(row[1])
+
+
+def _sources():
+    """(name, search_cols, output_cols, search_weights) for every domain and stack CSV"""
+    for config in CSV_CONFIG.values():
+        yield config["file"], config["search_cols"], config["output_cols"], config.get("search_weights")
+    for stack in STACK_CONFIG:
+        config = stack_config(stack)
+        yield config["file"], config["search_cols"], config["output_cols"], config["search_weights"]
+
+
+def build(db_path=None, data_dir=None):
+    """Compile (or refresh) every domain and stack CSV into the database; returns the CSVs included"""
+    from core import DATA_DIR
+    conn = connect(db_path)
+    included = []
+    for name, search_cols, output_cols, search_weights in _sources():
+        if _table(conn, name, Path(data_dir or DATA_DIR) / name, search_cols, output_cols, search_weights):
+            included.append(name)
+    return included
+
+
+# ============ QUERIES ============
+def match_expression(query, prefix=False):
+    """
+    FTS5 MATCH expression for query: any analyzed term (OR), each quoted.
+
+    A word ending in "*" (every word when prefix) matches as a prefix; prefix
+    words may be shorter than the analyzer's minimum length.
+    """
+    terms = []
+    for chunk in query.split():
+        star = prefix or chunk.endswith("*")
+        words = DEFAULT_ANALYZER.analyze(chunk.rstrip("*"))
+        if star and not words:
+            words = re.findall(r'\w+', chunk.lower())[-1:]
+        for i, word in enumerate(words):
+            terms.append(_quote(word) + ("*" if star and (prefix or i == len(words) - 1) else ""))
+    return " OR ".join(dict.fromkeys(terms))
+
+
+def _search_csv(conn, filepath, name, search_cols, output_cols, query, max_results, search_weights=None, prefix=False):
+    """Ranked rows, or None when neither the CSV nor a stored table exists"""
+    table = _table(conn, name, filepath, search_cols, output_cols, search_weights)
+    if table is None:
+        return None
+    expression = match_expression(query, prefix)
+    if not expression:
+        return []
+    tbl, columns = table
+    # One weight per table column: search columns, then the UNINDEXED ones
+    weights = [(search_weights or {}).get(col, 1.0) for col in search_cols]
+    weights += [0.0] * len([col for col in output_cols if col not in search_cols])
+    sql = (f"SELECT {', '.join(_quote(col) for col in columns)} FROM {_quote(tbl)} WHERE {_quote(tbl)} MATCH ? "
+           f"ORDER BY bm25({_quote(tbl)}, {', '.join(map(repr, weights))}), rowid LIMIT ?")
+    return [dict(zip(columns, values)) for values in conn.execute(sql, (expression, max_results))]
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, data_dir=None, db_path=None, prefix=False):
+    """core.search() as an FTS5 query; data_dir defaults to the shipped data"""
+    from core import DATA_DIR
+    if not fts5_available():
+        return {"error": "This Python's SQLite has no FTS5 support", "domain": domain}
+    if domain is None:
+        domain = detect_domain(query)
+
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = Path(data_dir or DATA_DIR) / config["file"]
+    conn = connect(db_path)
+
+    results = _search_csv(conn, filepath, config["file"], config["search_cols"], config["output_cols"], query,
+                          max_results, config.get("search_weights"), prefix)
+    if results is None:
+        return {"error": f"File not found: {filepath}", "domain": domain}
+
+    return {
+        "domain": domain,
+        "query": query,
+        "file": config["file"],
+        "count": len(results),
+        "results": results
+    }
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, data_dir=None, db_path=None, prefix=False):
+    """core.search_stack() as an FTS5 query"""
+    from core import DATA_DIR
+    if stack not in STACK_CONFIG:
+        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+    if not fts5_available():
+        return {"error": "This Python's SQLite has no FTS5 support", "stack": stack}
+
+    config = stack_config(stack)
+    name = config["file"]
+    filepath = Path(data_dir or DATA_DIR) / name
+    conn = connect(db_path)
+
+    results = _search_csv(conn, filepath, name, config["search_cols"], config["output_cols"], query,
+                          max_results, config["search_weights"], prefix)
+    if results is None:
+        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+
+    return {
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": name,
+        "count": len(results),
+        "results": results
+    }
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+    from search import format_output
+
+    parser = argparse.ArgumentParser(description="UI Pro Max SQLite FTS5 Search")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search")
+    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--prefix", action="store_true", help="Match every query word as a prefix")
+    parser.add_argument("--data-dir", type=str, default=None, help="Directory with the CSVs (default: shipped data)")
+    parser.add_argument("--db", type=str, default=None, help=f"Database file (default: <index dir>/{DB_FILE})")
+    parser.add_argument("--build", action="store_true", help="Compile every domain and stack CSV into the database")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    args = parser.parse_args()
+    if args.query is None and not args.build:
+        parser.error("the query argument is required (or use --build)")
+    if not fts5_available():
+        parser.error("this Python's SQLite was built without FTS5")
+
+    if args.build:
+        included = build(args.db, args.data_dir)
+        print(f"Compiled {len(included)} CSVs into {args.db or default_db_path()}")
+    if args.query is not None:
+        if args.stack:
+            result = search_stack(args.query, args.stack, args.max_results, args.data_dir, args.db, args.prefix)
+        else:
+            result = search(args.query, args.domain, args.max_results, args.data_dir, args.db, args.prefix)
+
+        if args.json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print(format_output(result))
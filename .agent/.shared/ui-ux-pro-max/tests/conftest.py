@@ -0,0 +1,70 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import core  # noqa: E402
+import design_system  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    """Empty index directory under tmp_path and no warm state, so no test touches the real .index"""
+    index = tmp_path / ".index"
+    monkeypatch.setattr(core, "INDEX_DIR", index)
+    monkeypatch.setattr(design_system, "INDEX_DIR", index)
+    monkeypatch.setattr(design_system, "DESIGN_CACHE", design_system.DesignSystemCache(index / "design-system.cache"))
+    cold_start()
+    core._DOMAIN_ROUTER = None
+    yield index
+    cold_start()
+    core._DOMAIN_ROUTER = None
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Writable copy of the data directory"""
+    data = tmp_path / "data"
+    shutil.copytree(core.DATA_DIR, data)
+    monkeypatch.setattr(core, "DATA_DIR", data)
+    monkeypatch.setattr(design_system, "DATA_DIR", data)
+    core._DOMAIN_ROUTER = None
+    return data
+
+
+def cold_start():
+    """Forget everything a new process would not have"""
+    core._LOADED_INDEXES.clear()
+    core._GLOBAL_INDEXES.clear()
+    core.RESULT_CACHE.clear()
+
+
+def delete_rows(filepath, predicate):
+    """Rewrite a CSV without the data rows matching predicate(index, row)"""
+    import csv
+    with open(filepath, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for i, row in enumerate(reader) if not predicate(i, row)]
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def edit_rows(filepath, edit):
+    """Rewrite a CSV with edit(header, rows) -> (header, rows) applied to its data rows"""
+    import csv
+    with open(filepath, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    header, rows = edit(header, rows)
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
@@ -0,0 +1,24 @@
+import threading
+
+import core
+
+
+def test_concurrent_writes_of_one_artifact(tmp_path):
+    path = tmp_path / "index" / "same.idx"
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(25):
+                core.write_artifact(path, {"version": core.INDEX_VERSION, "writer": n, "i": i})
+                assert core.read_artifact(path) is not None
+        except Exception as e:  # noqa: BLE001 - collect for the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert [p.name for p in path.parent.iterdir()] == ["same.idx"]
@@ -0,0 +1,38 @@
+import io
+import json
+
+import core
+import search
+
+
+def _run(lines, **defaults):
+    out = io.StringIO()
+    search.run_batch(lines, out, **defaults)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_results_match_single_searches_in_order(data_dir):
+    lines = ['{"query": "glassmorphism"}', '', '{"query": "dark mode", "domain": "ux", "max_results": 2}',
+             '{"query": "memo rerender", "stack": "react"}', '{"query": "bar chart trend"}']
+    assert _run(lines) == [core.search("glassmorphism"), core.search("dark mode", "ux", 2),
+                           core.search_stack("memo rerender", "react"), core.search("bar chart trend")]
+
+
+def test_defaults_apply_unless_the_line_overrides_them(data_dir):
+    lines = ['{"query": "memo"}', '{"query": "dark mode", "domain": "ux"}']
+    assert _run(lines, default_stack="react", default_max=1) == [core.search_stack("memo", "react", 1),
+                                                                 core.search("dark mode", "ux", 1)]
+
+
+def test_bad_lines_get_an_error_in_place(data_dir, monkeypatch):
+    monkeypatch.setattr(search, "BATCH_CHUNK", 2)
+    lines = ['not json', '["glass"]', '{"query": 3}', '{"query": "glass", "domain": "nope"}',
+             '{"query": "glass", "max_results": true}', '{"query": "glass", "max_results": -1}',
+             '{"query": "glass", "max_results": 0}', '{"query": "glass", "max_results": "2"}', '{"query": "glassmorphism"}']
+    found = _run(lines)
+
+    assert len(found) == len(lines)
+    assert all(set(result) == {"error"} for result in found[:3])
+    assert all(result["query"] == "glass" and "error" in result for result in found[3:8])
+    assert "max_results: True" in found[4]["error"] and "max_results: -1" in found[5]["error"]
+    assert found[8] == core.search("glassmorphism")
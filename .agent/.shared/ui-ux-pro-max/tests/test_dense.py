@@ -0,0 +1,35 @@
+import pytest
+
+import core
+
+pytest.importorskip("numpy")
+
+
+def _style_index():
+    config = core.CSV_CONFIG["style"]
+    return core._get_index(core.DATA_DIR / config["file"], config["search_cols"], config["output_cols"],
+                           config.get("search_weights"))
+
+
+def test_search_skips_terms_missing_from_dense_vocab(data_dir):
+    index = _style_index()
+    dense = core.DenseIndex.build(index.bm25)
+    dense.vocab = {term: col for term, col in dense.vocab.items() if term != "dark"}
+    assert dense.search(index.bm25, "dark glassmorphism", 3)
+    assert dense.search(index.bm25, "dark", 3) == []
+
+
+def test_dense_artifact_rebuilt_when_config_changes(data_dir, monkeypatch):
+    index = _style_index()
+    config = core._index_config(index.key[1], index.key[2], dict(index.key[3]))
+    core._load_dense(index.key[0], index.bm25, index.generation, config)
+
+    built = []
+    real_build = core.DenseIndex.build
+    monkeypatch.setattr(core.DenseIndex, "build", classmethod(lambda cls, bm25: built.append(bm25) or real_build(bm25)))
+    core._load_dense(index.key[0], index.bm25, index.generation, config)
+    assert built == []
+
+    other = config[:-1] + ((2,) + config[-1][1:],)
+    core._load_dense(index.key[0], index.bm25, index.generation, other)
+    assert built == [index.bm25]
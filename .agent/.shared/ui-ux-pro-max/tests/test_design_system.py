@@ -0,0 +1,48 @@
+import core
+import design_system
+
+
+def test_batch_reports_cache_hits(data_dir, tmp_path):
+    spec = {"projects": [{"query": "SaaS analytics dashboard", "project_name": "Acme", "pages": ["dashboard"]}]}
+
+    first = design_system.generate_design_system_batch(spec, str(tmp_path / "out"))
+    second = design_system.generate_design_system_batch(spec, str(tmp_path / "out"))
+    assert [p["cached"] for p in first["projects"]] == [False]
+    assert [p["cached"] for p in second["projects"]] == [True]
+    assert second["projects"][0]["files_written"] == 0
+
+
+def test_generate_cached_returns_hit_flag(data_dir):
+    result, hit = design_system.generate_cached("beauty spa wellness", save=False)
+    assert not hit
+    again, hit = design_system.generate_cached("beauty spa wellness", save=False)
+    assert hit and again == result and again is not result
+
+
+def test_lookups_share_one_pass_per_query(data_dir, monkeypatch):
+    calls = []
+    search_domains = design_system.search_domains
+    monkeypatch.setattr(design_system, "search_domains", lambda query, limits: calls.append(dict(limits)) or search_domains(query, limits))
+    generator = design_system.DesignSystemGenerator()
+    found = generator._run_lookups([("style", "fintech app", 3), ("color", "fintech app", 2),
+                                    ("style", "fintech app", 1), ("style", "fintech app", 3)])
+
+    assert calls == [{"style": 3, "color": 2}, {"style": 1}]
+    assert found[0] is found[3]
+    assert [f["results"] for f in found[:3]] == [core.search("fintech app", d, n)["results"]
+                                                 for d, n in (("style", 3), ("color", 2), ("style", 1))]
+    assert generator._run_lookups([("color", "fintech app", 2)]) == [found[1]] and len(calls) == 2
+
+
+def test_write_if_changed_keeps_file_modes(tmp_path):
+    new = tmp_path / "MASTER.md"
+    assert design_system._write_if_changed(new, "# Master\n")
+    assert new.stat().st_mode & 0o777 == 0o666 & ~design_system._UMASK
+
+    existing = tmp_path / "page.md"
+    existing.write_text("old\n", encoding="utf-8")
+    existing.chmod(0o640)
+    assert design_system._write_if_changed(existing, "new\n")
+    assert existing.read_text(encoding="utf-8") == "new\n"
+    assert existing.stat().st_mode & 0o777 == 0o640
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["MASTER.md", "page.md"]
@@ -0,0 +1,54 @@
+from collections import Counter
+
+import core
+from conftest import delete_rows
+
+
+def _reference(query, domain, where, max_results):
+    """Filter the full unfiltered ranking by where; facet counts over every filtered hit"""
+    wanted = {column: {value.lower() for value in values} for column, values in where.items()}
+    hits = [row for row in core.search(query, domain, 10 ** 6)["results"]
+            if all(str(row[column]).lower() in values for column, values in wanted.items())]
+    counts = {column: dict(Counter(row[column] for row in hits)) for column in core.CSV_CONFIG[domain]["facet_cols"]}
+    return hits[:max_results], counts
+
+
+def test_filter_and_counts_match_a_filtered_ranking(data_dir):
+    for query, where in [("focus keyboard", {"Severity": ["high", "Medium"]}),
+                         ("touch target mobile", {"Platform": ["Mobile", "All"], "Severity": ["High"]}),
+                         ("loading", {"Category": ["Nothing Like This"]})]:
+        found = core.search(query, "ux", 3, where=where, facets=True)
+        rows, counts = _reference(query, "ux", where, 3)
+        assert found["results"] == rows, where
+        assert found["facets"] == counts, where
+        assert found["where"] == where
+
+
+def test_where_forms_are_equivalent(data_dir):
+    expected = core.search("focus", "ux", 5, where={"Severity": "High", "Platform": ["Web", "All"]})["results"]
+    assert core.search("focus", "ux", 5, where=["Severity=High", "Platform=Web", "Platform=All"])["results"] == expected
+    assert core.search("focus", "ux", 5, where=[("Severity", "high"), ("Platform", "WEB"), ("Platform", "all")])["results"] == expected
+
+
+def test_stack_facets(data_dir):
+    found = core.search_stack("memo rerender", "react", 2, where=["Severity=High"], facets=True)
+    assert all(row["Severity"] == "High" for row in found["results"])
+    assert set(found["facets"]) == {"Category", "Severity"} and set(found["facets"]["Severity"]) <= {"High"}
+
+
+def test_filter_errors(data_dir):
+    assert core.search("focus", "ux", where=["Nope=1"])["error"].startswith("Unknown facet column: Nope")
+    assert core.search("focus", "style", where=["Type=General"])["error"] == "No facet columns configured for this source"
+    assert "expected Column=Value" in core.search("focus", "ux", where=["Severity"])["error"]
+    assert "positive integer" in core.search("focus", "ux", -1, where=["Severity=High"])["error"]
+    assert core.search_stack("memo", "react,vue", where=["Severity=High"])["error"] == "Facet filters and counts need a single stack"
+
+
+def test_filters_follow_row_updates(data_dir):
+    where = {"Severity": ["High"]}
+    first = core.search("focus keyboard", "ux", 1, where=where)["results"][0]
+    delete_rows(data_dir / "ux-guidelines.csv", lambda i, row: row[2] == first["Issue"])
+    found = core.search("focus keyboard", "ux", 3, where=where, facets=True)
+    assert first not in found["results"]
+    rows, counts = _reference("focus keyboard", "ux", where, 3)
+    assert (found["results"], found["facets"]) == (rows, counts)
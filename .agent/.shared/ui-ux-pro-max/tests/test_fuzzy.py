@@ -0,0 +1,40 @@
+import core
+
+
+VOCAB = ["neumorphism", "modern", "model", "formal", "formatting", "for", "forms", "icons", "button",
+         "glassmorphism", "typography", "animation"]
+
+
+def _fuzzy(word):
+    return [term for term, _ in core.fuzzy_terms(core.build_trigram_index(VOCAB), word, core.FUZZY_THRESHOLD)]
+
+
+def test_typos_match():
+    assert _fuzzy("glasmorphsm") == ["glassmorphism"]
+    assert _fuzzy("animaton") == ["animation"]
+
+
+def test_near_complete_prefix_and_plural_match():
+    assert _fuzzy("typograph") == ["typography"]
+    assert _fuzzy("neumorph") == ["neumorphism"]
+    assert _fuzzy("icon") == ["icons"]
+    assert _fuzzy("buttons") == ["button"]
+    assert "forms" in _fuzzy("form")
+
+
+def test_short_prefix_is_another_word():
+    assert "modern" not in _fuzzy("mode")
+    assert "formatting" not in _fuzzy("form")
+    assert "formal" not in _fuzzy("form")
+    assert "for" not in _fuzzy("form")
+
+
+def test_unrelated_words_return_nothing(data_dir):
+    assert core.search("dark mode", "typography")["count"] == 0
+    assert core.search("form validation", "react")["count"] == 0
+    assert core.search("glasmorphsm", "style")["results"][0]["Style Category"] == "Glassmorphism"
+
+
+def test_prefix_search(data_dir):
+    assert core.search("neumorph", "style")["results"][0]["Style Category"] == "Neumorphism"
+    assert core.search("glassmorph", "style")["results"][0]["Style Category"] == "Glassmorphism"
@@ -0,0 +1,148 @@
+import csv
+import threading
+
+import core
+from conftest import cold_start, delete_rows, edit_rows
+
+
+def _style_path():
+    return core.DATA_DIR / core.CSV_CONFIG["style"]["file"]
+
+
+def _first_style():
+    with open(_style_path(), newline='', encoding='utf-8') as f:
+        return next(csv.DictReader(f))["Style Category"]
+
+
+def _load_counts(query):
+    """Search styles in a fresh process and return (results, profile counters)"""
+    cold_start()
+    with core.profiled() as profile:
+        found = core.search(query, "style", 3)
+    return [row["Style Category"] for row in found["results"]], profile.report()["counters"]
+
+
+def _names(result):
+    return [row["Style Category"] for row in result["results"]]
+
+
+def _fresh(query):
+    """Results for query from an index rebuilt from scratch"""
+    core.artifact_path(_style_path()).unlink()
+    return _load_counts(query)[0]
+
+
+def test_unchanged_csv_loads_artifact(data_dir):
+    _load_counts("glassmorphism")
+    _, counters = _load_counts("glassmorphism")
+    assert counters.get("index_loads") == 1
+    assert "index_updates" not in counters and "index_builds" not in counters
+
+
+def test_edited_row_is_updated_in_place(data_dir):
+    _load_counts("glassmorphism")
+
+    def rename(header, rows):
+        rows[0][header.index("Keywords")] += ", zebraquartz"
+        return header, rows
+    edit_rows(_style_path(), rename)
+
+    results, counters = _load_counts("zebraquartz")
+    assert counters.get("index_updates") == 1
+    assert results == [_first_style()]
+    assert results == _fresh("zebraquartz")
+
+
+def test_added_and_deleted_rows_match_fresh_build(data_dir):
+    _load_counts("glassmorphism")
+
+    def append(header, rows):
+        row = list(rows[0])
+        row[header.index("Style Category")] = "Quartzwave"
+        row[header.index("Keywords")] = "quartzwave, shimmer"
+        return header, rows + [row]
+    edit_rows(_style_path(), append)
+    delete_rows(_style_path(), lambda i, row: "Glassmorphism" in row[1])
+
+    results, counters = _load_counts("quartzwave glassmorphism")
+    assert counters.get("index_updates") == 1
+    assert results[0] == "Quartzwave" and "Glassmorphism" not in results
+    assert results == _fresh("quartzwave glassmorphism")
+
+
+def test_header_change_rebuilds(data_dir):
+    _load_counts("glassmorphism")
+    edit_rows(_style_path(), lambda header, rows: (header[:-1] + ["Complexity Level"], rows))
+    _, counters = _load_counts("glassmorphism")
+    assert counters.get("index_builds") == 1 and "index_updates" not in counters
+
+
+def test_large_edit_rebuilds(data_dir):
+    _load_counts("glassmorphism")
+    delete_rows(_style_path(), lambda i, row: i % 3 != 0)
+    _, counters = _load_counts("glassmorphism")
+    assert counters.get("index_builds") == 1 and "index_updates" not in counters
+
+
+def test_persisted_cache_survives_update_then_rebuild(data_dir, tmp_path):
+    styles = data_dir / core.CSV_CONFIG["style"]["file"]
+    cache_file = tmp_path / "results.cache"
+
+    core.search("glassmorphism", "style", 1)
+    delete_rows(styles, lambda i, row: i == 0)
+
+    # Incremental update tombstones row 0; cache ids computed against that layout
+    updated = _names(core.search("glassmorphism", "style", 1))
+    core.RESULT_CACHE.save(cache_file)
+
+    # A fresh build of the same CSV numbers rows differently
+    core.artifact_path(styles).unlink()
+    cold_start()
+    core.RESULT_CACHE.load(cache_file)
+    assert _names(core.search("glassmorphism", "style", 1)) == updated
+
+    cold_start()
+    assert _names(core.search("glassmorphism", "style", 1)) == updated
+
+
+def test_cache_invalidated_when_rows_edited_concurrently(data_dir):
+    styles = data_dir / core.CSV_CONFIG["style"]["file"]
+    core.search("glassmorphism", "style", 3)
+    delete_rows(styles, lambda i, row: i < 3)
+
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(20):
+                core.search("glassmorphism", "style", 3)
+        except Exception as e:  # noqa: BLE001 - collect for the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    expected = _names(core.search("glassmorphism", "style", 3))
+    core.artifact_path(styles).unlink()
+    cold_start()
+    assert _names(core.search("glassmorphism", "style", 3)) == expected
+
+
+def test_generation_changes_on_update_and_rebuild(data_dir):
+    config = core.CSV_CONFIG["style"]
+    styles = data_dir / config["file"]
+    args = (styles, config["search_cols"], config["output_cols"], config.get("search_weights", {}))
+
+    first = core._load_index(*args)[2]
+    assert core._load_index(*args)[2] == first
+
+    delete_rows(styles, lambda i, row: i == 0)
+    updated = core._load_index(*args)[2]
+    assert updated != first
+
+    core.artifact_path(styles).unlink()
+    assert core._load_index(*args)[2] != updated
@@ -0,0 +1,50 @@
+import pytest
+
+import core
+import mmap_index
+from conftest import delete_rows
+
+QUERIES = ["glassmorphism", "dark mode", "minimal clean portfolio", "accessibility contrast", "bold", "nothing"]
+
+
+@pytest.fixture(autouse=True)
+def close_indexes():
+    yield
+    for index in mmap_index._OPEN_INDEXES.values():
+        index.close()
+    mmap_index._OPEN_INDEXES.clear()
+
+
+def _config(domain):
+    config = core.CSV_CONFIG[domain]
+    return core.DATA_DIR / config["file"], config["search_cols"], config["output_cols"], config.get("search_weights")
+
+
+@pytest.mark.parametrize("domain", ["style", "ux", "color"])
+def test_results_match_core(data_dir, domain):
+    for query in QUERIES:
+        assert mmap_index.search(query, domain, 5) == core.search(query, domain, 5), query
+
+
+def test_stack_results_match_core(data_dir):
+    for query in ["memo", "image optimization", "state hooks"]:
+        assert mmap_index.search_stack(query, "react", 5) == core.search_stack(query, "react", 5), query
+
+
+def test_spilled_runs_merge_to_the_same_files(data_dir, tmp_path):
+    filepath, search_cols, output_cols, weights = _config("ux")
+    mmap_index.build(filepath, tmp_path / "one-run", search_cols, output_cols, weights)
+    mmap_index.build(filepath, tmp_path / "spilled", search_cols, output_cols, weights, spill_postings=64)
+    for name in ["terms.bin", "term_offsets.bin", "post_offsets.bin", "post_docs.bin", "post_tfs.bin", "doc_offsets.bin"]:
+        assert (tmp_path / "one-run" / name).read_bytes() == (tmp_path / "spilled" / name).read_bytes(), name
+
+
+def test_rebuilt_when_the_csv_changes(data_dir):
+    filepath = _config("style")[0]
+    before = mmap_index.open_index(*_config("style"))
+    first = mmap_index.search("glassmorphism", "style", 1)["results"]
+
+    delete_rows(filepath, lambda i, row: row[1] == first[0]["Style Category"])
+    after = mmap_index.open_index(*_config("style"))
+    assert after is not before and after.N == before.N - 1
+    assert mmap_index.search("glassmorphism", "style", 1) == core.search("glassmorphism", "style", 1)
@@ -0,0 +1,59 @@
+import threading
+
+import core
+
+
+def test_search_reports_stages_and_counters(data_dir):
+    with core.profiled("search") as profile:
+        core.search("glassmorphism dark", "style")
+    report = profile.report()
+    assert report["label"] == "search"
+    assert {"index.build", "search.tokenize", "search.score", "search.rank", "search.rows"} <= set(report["stages_ms"])
+    assert report["counters"]["cache_misses"] == 1 and report["counters"]["docs_scored"] > 0
+    assert report["total_ms"] >= max(report["stages_ms"].values())
+
+    with core.profiled() as profile:
+        core.search("glassmorphism dark", "style")
+    assert profile.report()["counters"]["cache_hits"] == 1
+
+
+def test_nothing_is_recorded_outside_a_profile(data_dir):
+    with core.profiled(enabled=False) as profile:
+        assert profile is None
+        assert core.profile_stage("search.score") is core.profile_stage("search.rows")
+        core.search("glassmorphism", "style")
+    with core.profiled() as profile:
+        pass
+    assert profile.report()["stages_ms"] == {} and profile.report()["counters"] == {}
+
+
+def test_worker_threads_report_into_the_callers_profile():
+    def work():
+        core.profile_count("work")
+
+    with core.profiled() as profile:
+        # The unwrapped thread runs in a fresh context and records nothing
+        threads = [threading.Thread(target=core.profile_worker(work)) for _ in range(4)] + [threading.Thread(target=work)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert profile.report()["counters"] == {"work": 4}
+
+
+def test_histogram_hook_buckets_reports():
+    histogram = core.ProfileHistogram()
+    core.add_profile_hook(histogram)
+    try:
+        for _ in range(3):
+            with core.profiled("ping"):
+                core.profile_count("calls")
+    finally:
+        core.remove_profile_hook(histogram)
+    with core.profiled("ping"):
+        pass
+
+    snapshot = histogram.snapshot()["ping"]
+    assert snapshot["calls"] == 3 and snapshot["counters"] == {"calls": 3}
+    assert sum(snapshot["stages"]["total"].values()) == 3
+    assert [core.ProfileHistogram.bucket(ms) for ms in (0, 0.3, 1, 1.5, 2, 3)] == [0, 0.5, 1, 2, 2, 4]
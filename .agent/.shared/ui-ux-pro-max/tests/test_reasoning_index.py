@@ -0,0 +1,57 @@
+import csv
+import random
+
+import design_system
+
+
+def _linear_scan(rules, category):
+    """The original first-match scan: exact, then partial, then keyword match"""
+    category = category.lower()
+    ui_cats = [rule.get("UI_Category", "").lower() for rule in rules]
+    for idx, ui_cat in enumerate(ui_cats):
+        if ui_cat == category:
+            return idx
+    for idx, ui_cat in enumerate(ui_cats):
+        if ui_cat in category or category in ui_cat:
+            return idx
+    for idx, ui_cat in enumerate(ui_cats):
+        if any(kw in category for kw in ui_cat.replace("/", " ").replace("-", " ").split()):
+            return idx
+    return -1
+
+
+def _shipped_rules():
+    with open(design_system.DATA_DIR / design_system.REASONING_FILE, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_shipped_rules_match_linear_scan():
+    rules = _shipped_rules()
+    index = design_system.ReasoningIndex(rules)
+    with open(design_system.DATA_DIR / "products.csv", newline='', encoding='utf-8') as f:
+        categories = [row["Product Type"] for row in csv.DictReader(f)]
+    categories += [rule["UI_Category"] for rule in rules] + ["General", "", "saas", "Fintech/Crypto", "zzz"]
+
+    rng = random.Random(7)
+    for ui_cat in [rule["UI_Category"] for rule in rules]:
+        start = rng.randrange(len(ui_cat))
+        categories.append(ui_cat[start:start + rng.randint(1, 8)])
+    for category in categories:
+        assert index.find(category) == _linear_scan(rules, category), category
+
+
+def test_edge_cases_match_linear_scan():
+    rules = [{"UI_Category": name} for name in ["Photo/Video", "AI", "Video Editor", "", "Editor-Tools", "ai"]]
+    index = design_system.ReasoningIndex(rules)
+    for category in ["video\nai", "o\nv", "photo", "Tools", "editor", "Video", "x", "", "PHOTO/VIDEO", "deo edi"]:
+        assert index.find(category) == _linear_scan(rules, category), category
+
+
+def test_recompiled_when_the_file_changes(data_dir):
+    first = design_system._reasoning_index()
+    assert design_system._reasoning_index() is first
+
+    filepath = data_dir / design_system.REASONING_FILE
+    with open(filepath, 'a', newline='', encoding='utf-8') as f:
+        f.write("\n")
+    assert design_system._reasoning_index() is not first
@@ -0,0 +1,47 @@
+import core
+from conftest import cold_start
+
+
+def test_lru_eviction_and_stats():
+    cache = core.ResultCache(maxsize=2)
+    cache.put("a", "g1", [1])
+    cache.put("b", "g1", [2])
+    assert cache.get("a", "g1") == [1]
+    cache.put("c", "g1", [3])  # evicts b, the least recently used
+    assert cache.get("b", "g1") is None
+    assert cache.get("c", "g1") == [3]
+    assert cache.get("a", "g2") is None  # other generation: dropped
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]) == (2, 2, 1, 1)
+    assert stats["size"] == 1
+
+
+def test_key_ignores_word_order_and_punctuation(data_dir):
+    core.search("glassmorphism dark", "style")
+    hits = core.RESULT_CACHE.stats()["hits"]
+    core.search("Dark, glassmorphism!", "style")
+    assert core.RESULT_CACHE.stats()["hits"] == hits + 1
+
+
+def test_save_and_load_round_trip(data_dir, tmp_path):
+    cache_file = tmp_path / "results.cache"
+    expected = core.search("saas dashboard", "product")
+    core.RESULT_CACHE.save(cache_file)
+
+    cold_start()
+    core.RESULT_CACHE.load(cache_file)
+    assert core.search("saas dashboard", "product") == expected
+    assert core.RESULT_CACHE.stats()["hits"] >= 1
+
+
+def test_rebuilt_index_ignores_cached_ids(data_dir, tmp_path):
+    styles = data_dir / core.CSV_CONFIG["style"]["file"]
+    cache_file = tmp_path / "results.cache"
+    core.search("glassmorphism", "style")
+    core.RESULT_CACHE.save(cache_file)
+
+    core.artifact_path(styles).unlink()
+    cold_start()
+    core.RESULT_CACHE.load(cache_file)
+    core.search("glassmorphism", "style")
+    assert core.RESULT_CACHE.stats()["invalidations"] >= 1
@@ -0,0 +1,67 @@
+import csv
+
+import core
+
+
+def test_keyword_file_parse_matches_csv_module():
+    filepath = core.DATA_DIR / core.DOMAIN_KEYWORDS_FILE
+    expected = {}
+    with open(filepath, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            words = [kw.strip().lower() for kw in row["Keywords"].split(",")]
+            expected.setdefault(row["Domain"].strip(), []).extend(kw for kw in words if kw)
+    router = core.DomainRouter.from_text(filepath.read_text(encoding='utf-8'))
+    assert router.scores("") == dict.fromkeys(expected, 0)
+    for domain, words in expected.items():
+        for word in words:
+            assert router.scores(word)[domain] >= 1, (domain, word)
+
+
+def test_automaton_counts_like_substring_search():
+    keywords = {"icons": ["icon", "svg icon", "con"], "chart": ["chart", "bar chart", "art"], "style": ["dark", "dark mode"]}
+    router = core.DomainRouter(keywords)
+    for text in ["svg icon set", "bar chart art", "dark mode dark", "iconography", "", "no match at all", "barchart"]:
+        expected = {domain: sum(word in text for word in words) for domain, words in keywords.items()}
+        assert router.scores(text) == expected, text
+
+
+def test_detect_domain(data_dir):
+    assert core.detect_domain("glassmorphism dark mode") == "style"
+    assert core.detect_domain("color palette for fintech") == "color"
+    assert core.detect_domain("svg icon set") == "icons"
+    assert core.detect_domain("nothing matches here") == "style"
+
+
+def test_compiled_router_reused_until_file_changes(data_dir, monkeypatch):
+    core._DOMAIN_ROUTER = None
+    scores = core.domain_scores("chart palette")
+
+    parsed = []
+    real_from_text = core.DomainRouter.from_text
+    monkeypatch.setattr(core.DomainRouter, "from_text",
+                        classmethod(lambda cls, text: parsed.append(text) or real_from_text(text)))
+
+    core._DOMAIN_ROUTER = None
+    assert core.domain_scores("chart palette") == scores
+    assert parsed == []
+
+    keywords = data_dir / core.DOMAIN_KEYWORDS_FILE
+    keywords.write_text(keywords.read_text(encoding='utf-8').rstrip("\n") + '\nquiz,"quiz, trivia"\n', encoding='utf-8')
+    assert core.detect_domain("trivia night") == "style"  # running process keeps its router
+
+    core._DOMAIN_ROUTER = None
+    assert core.domain_scores("trivia night")["quiz"] == 1
+    assert len(parsed) == 1
+
+
+def test_search_routes_without_loading_other_indexes(data_dir):
+    assert core.search("color palette for fintech")["domain"] == "color"
+    assert core.search("nothing matches here")["domain"] == "style"
+    assert not core._GLOBAL_INDEXES
+    assert {key[0] for key in core._LOADED_INDEXES} == {
+        str(data_dir / core.CSV_CONFIG[domain]["file"]) for domain in ("color", "style")}
+
+
+def test_batch_routes_each_query(data_dir):
+    found = core.search_batch(["glassmorphism", "bar chart trend", "svg icon"])
+    assert [result["domain"] for result in found] == ["style", "chart", "icons"]
@@ -0,0 +1,43 @@
+import json
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import core
+import server
+
+
+def _call(method, **params):
+    response = server.handle_request(json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}))
+    assert "error" not in response, response
+    return response["result"]
+
+
+def test_batch_methods_match_in_process(data_dir):
+    queries = ["glassmorphism", "dark mode", "glasmorphsm"]
+    assert _call("search_batch", queries=queries, domain=None, max_results=2) == core.search_batch(queries, None, 2)
+    assert (_call("search_stack_batch", queries=queries, stack="react", max_results=2)
+            == core.search_stack_batch(queries, "react", 2))
+
+
+def test_multi_stack_hybrid_is_an_error(data_dir):
+    result = _call("search_stack", query="memo rerender", stack="react,vue", max_results=2, hybrid=True)
+    assert result == {"error": "Hybrid ranking needs a single stack", "stack": "react,vue"}
+
+
+def test_sigterm_shuts_down_and_removes_the_socket(tmp_path):
+    path = tmp_path / "uipro.sock"
+    proc = subprocess.Popen([sys.executable, "-c", "import sys, server; server.serve_unix(sys.argv[1])", str(path)],
+                            cwd=Path(server.__file__).parent)
+    try:
+        deadline = time.monotonic() + 10
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert server.call(str(path), "ping") == "pong"
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+    finally:
+        proc.kill()
+    assert not path.exists()
@@ -0,0 +1,59 @@
+import shutil
+
+import pytest
+
+import core
+import sqlite_index
+from conftest import delete_rows
+
+pytestmark = pytest.mark.skipif(not sqlite_index.fts5_available(), reason="SQLite without FTS5")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "search.sqlite"
+    yield path
+    conn = sqlite_index._LOCAL.__dict__.get("connections", {}).pop(str(path), None)
+    if conn is not None:
+        conn.close()
+
+
+def _names(result):
+    return [row["Style Category"] for row in result["results"]]
+
+
+def test_matches_the_same_rows_as_core(data_dir, db_path):
+    for query in ["glassmorphism", "neumorphism", "dark mode", "minimal clean"]:
+        found = sqlite_index.search(query, "style", 100, db_path=db_path)
+        expected = core.search(query, "style", 100)
+        assert sorted(_names(found)) == sorted(_names(expected)), query
+        assert _names(found)[:1] == _names(expected)[:1], query
+        assert all(list(row) == list(ref) for row, ref in zip(found["results"], expected["results"]))
+
+
+def test_stack_search(data_dir, db_path):
+    found = sqlite_index.search_stack("memo", "react", 3, db_path=db_path)
+    assert found["count"] > 0 and found["stack"] == "react"
+    assert sqlite_index.search_stack("memo", "nope", db_path=db_path)["error"].startswith("Unknown stack")
+
+
+def test_prefix_queries(data_dir, db_path):
+    assert sqlite_index.match_expression("glass* dark") == '"glass"* OR "dark"'
+    assert sqlite_index.match_expression("glass dark", prefix=True) == '"glass"* OR "dark"*'
+    assert _names(sqlite_index.search("glassmorph*", "style", 1, db_path=db_path)) == ["Glassmorphism"]
+    assert sqlite_index.search("glassmorph", "style", 1, db_path=db_path)["count"] == 0
+
+
+def test_table_rebuilt_when_the_csv_changes(data_dir, db_path):
+    assert "Glassmorphism" in _names(sqlite_index.search("glassmorphism", "style", 5, db_path=db_path))
+    delete_rows(data_dir / "styles.csv", lambda i, row: row[1] == "Glassmorphism")
+    assert "Glassmorphism" not in _names(sqlite_index.search("glassmorphism", "style", 5, db_path=db_path))
+
+
+def test_built_database_works_without_the_csvs(data_dir, db_path, tmp_path):
+    included = sqlite_index.build(db_path)
+    assert len(included) == len(core.CSV_CONFIG) + len(core.STACK_CONFIG)
+    expected = sqlite_index.search("glassmorphism", "style", 3, db_path=db_path)
+
+    shutil.rmtree(data_dir)
+    assert sqlite_index.search("glassmorphism", "style", 3, db_path=db_path) == expected
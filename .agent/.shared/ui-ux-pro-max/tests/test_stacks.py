@@ -0,0 +1,14 @@
+import core
+
+
+def test_also_in_only_on_rows_with_duplicates(data_dir):
+    found = core.search_stacks("accessibility label", "all", max_results=3, global_results=10)
+    merged = [row for row in found["results"] if "Also In" in row]
+    assert merged and all(row["Also In"] for row in merged)
+    assert any("Also In" not in row for row in found["results"])
+
+
+def test_per_stack_tops_match_search_stack(data_dir):
+    found = core.search_stacks("memo rerender", "react,nextjs,vue")
+    for name in ("react", "nextjs", "vue"):
+        assert found["by_stack"][name]["results"] == core.search_stack("memo rerender", name)["results"]
@@ -0,0 +1,7 @@
+import benchmark
+
+
+def test_cold_search_within_startup_budget():
+    result = benchmark.measure_startup()
+    assert result["ratio"] <= benchmark.STARTUP_BUDGET_RATIO, result
+    assert result["deferred_imported"] == [], result
@@ -0,0 +1,34 @@
+import pytest
+
+import core
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+QUERIES = ["glassmorphism", "dark mode dark", "glasmorphsm", "minimal clean portfolio", "accessibility",
+           "nothing matches here", "neumorph", "bold", "luxury elegant serif"]
+
+
+def _index(domain):
+    config = core.CSV_CONFIG[domain]
+    return core._get_index(core.DATA_DIR / config["file"], config["search_cols"], config["output_cols"],
+                           config.get("search_weights"))
+
+
+@pytest.mark.parametrize("domain", ["style", "ux", "typography"])
+@pytest.mark.parametrize("top_k", [1, 3, 1000])
+def test_score_batch_matches_bm25(data_dir, domain, top_k):
+    index = _index(domain)
+    expected = [[(idx, score) for idx, score in index.bm25.score(query, top_k=top_k) if score > 0] for query in QUERIES]
+    found = index.vector().score_batch(QUERIES, top_k)
+    assert [[idx for idx, _ in ranked] for ranked in found] == [[idx for idx, _ in ranked] for ranked in expected]
+    for ranked, reference in zip(found, expected):
+        assert [score for _, score in ranked] == pytest.approx([score for _, score in reference])
+
+
+def test_search_batch_uses_vectors_and_matches_search(data_dir):
+    with core.profiled() as profile:
+        found = core.search_batch(QUERIES, "style", 3)
+    assert "search.score_batch" in profile.report()["stages_ms"]
+    core.RESULT_CACHE.clear()
+    assert found == [core.search(query, "style", 3) for query in QUERIES]